@@ -0,0 +1,92 @@
+"""
+Request Body Size Limits
+-------------------------
+Starlette spools a multipart body to disk before a route (or any FastAPI
+dependency) sees it, so a per-file size check inside the route only runs
+after the whole upload has been received.  This ASGI middleware enforces a
+byte limit per path prefix before any parsing:
+
+- a declared Content-Length above the limit is answered 413 immediately,
+  without reading the body;
+- a chunked (or under-declared) body is counted as it is received and the
+  request is answered 413 as soon as the limit is crossed.
+"""
+import json
+from typing import Dict, Optional
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def _reject(send, limit: int):
+    body = json.dumps({"detail": f"Request body exceeds the {limit // (1024 * 1024)} MB limit."}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        # Longest prefix first so /disease/detect-batch wins over /disease/detect
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def limit_for(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            return await self.app(scope, receive, send)
+        limit = self.limit_for(scope["path"])
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > limit:
+                    return await _reject(send, limit)
+                break
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                # The app turned the aborted read into its own error response; replace it
+                return
+            started = message["type"] == "http.response.start" or started
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except BodyTooLarge:
+            pass
+        if exceeded and not started:
+            await _reject(send, limit)
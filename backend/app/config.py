@@ -8,13 +8,48 @@ class Settings(BaseSettings):
     WEATHER_API_KEY: str = ""
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
+    # Google ID-token signing certs (point at `python -m app.services.google_certs_stub` in tests)
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
     SECRET_KEY: str = "cropsense-super-secret-jwt-key-2026"
+    # bcrypt runs on this many threads; further logins beyond the queue limit get 503
+    AUTH_HASH_WORKERS: int = 2
+    AUTH_HASH_MAX_QUEUE: int = 32
+    # Verified token → user cache lifetime (capped by token expiry; 0 disables)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 300
+    # Per-client token buckets (rules in app/rate_limit.py) and global load shedding
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    MAX_CONCURRENT_REQUESTS: int = 64
+    MAX_QUEUED_REQUESTS: int = 256
+    # Proxies in front of the app that append to X-Forwarded-For (0 → use the socket peer)
+    TRUSTED_PROXY_HOPS: int = 0
     # Cloudinary (optional — leave blank to use base64 fallback)
     CLOUDINARY_CLOUD_NAME: str = ""
     CLOUDINARY_API_KEY: str = ""
     CLOUDINARY_API_SECRET: str = ""
+    # Local content-addressed image store used when Cloudinary is not configured
+    BLOB_STORE_DIR: str = "data/blobs"
+    # Absolute origin prefixed to locally served image URLs (blank → relative URLs)
+    PUBLIC_BASE_URL: str = ""
     # Plant.id API (optional — leave blank to use mock ML)
     PLANT_ID_API_KEY: str = ""
+    # Override to point at a local stub (`python -m app.services.plant_id_stub`)
+    PLANT_ID_API_URL: str = "https://api.plant.id/v3/health_assessment"
+    # Disease analysis backend: auto (Plant.id when usable, else local once trained, else mock) | local | plant_id | mock
+    DISEASE_BACKEND: str = "auto"
+    # Trained linear classifier weights (.npz with W, b, labels); seeded prototypes if absent
+    DISEASE_MODEL_PATH: str = "data/disease_model.npz"
+    # Background analysis jobs (POST /disease/detect?async=true)
+    DISEASE_JOB_WORKERS: int = 4
+    DISEASE_JOB_QUEUE_SIZE: int = 100
+    # Finished (or abandoned) job documents are removed this long after creation
+    DISEASE_JOB_TTL_SECONDS: int = 7 * 24 * 3600
+    # Repeat scans of the same image reuse the stored analysis for this long
+    DISEASE_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    # Gridded monthly climatology (built with `python -m app.services.climatology`)
+    CLIMATOLOGY_PATH: str = "data/climatology.npy"
+    # Nightly yield-factor tiles (built with `python -m app.services.yield_tiles`)
+    YIELD_TILES_DIR: str = "data/yield_tiles"
 
     class Config:
         env_file = ".env"
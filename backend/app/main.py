@@ -14,12 +14,40 @@ async def lifespan(app: FastAPI):
     from app.database import db
     from app.repositories.user_repository import UserRepository
     await UserRepository(db.db).ensure_indexes()
+    from app.repositories.disease_cache_repository import DiseaseCacheRepository
+    await DiseaseCacheRepository(db.db).ensure_indexes(settings.DISEASE_CACHE_TTL_SECONDS)
+    from app.repositories.disease_job_repository import DiseaseJobRepository
+    await DiseaseJobRepository(db.db).ensure_indexes(settings.DISEASE_JOB_TTL_SECONDS)
+    # Precompute spoilage lookup tables (~1 ms, ~0.3 MB)
+    from app.services.spoilage_model import spoilage_tables
+    spoilage_tables.build()
+    # Background disease-analysis workers (re-queues jobs left unfinished)
+    from app.services.disease_jobs import disease_jobs
+    await disease_jobs.start(db.db)
+    # Keep Google sign-in certs warm so /auth/google verifies without network
+    from app.services.google_certs import google_certs
+    if settings.GOOGLE_CLIENT_ID:
+        google_certs.start()
     yield
     # Shutdown logic
+    await google_certs.stop()
+    await disease_jobs.stop()
+    from app.services.thumbnails import shutdown_pool
+    shutdown_pool()
     await close_mongo_connection()
 
 app = FastAPI(title="CropSense AI API", version="1.0.0", lifespan=lifespan)
 
+# Upload size limits, checked before the body is read (innermost, after rate limiting)
+from app.body_limit import BodySizeLimitMiddleware
+from app.routes.disease import UPLOAD_BODY_LIMITS as DISEASE_BODY_LIMITS
+from app.routes.spoilage import UPLOAD_BODY_LIMITS as SPOILAGE_BODY_LIMITS
+app.add_middleware(BodySizeLimitMiddleware, limits={**DISEASE_BODY_LIMITS, **SPOILAGE_BODY_LIMITS})
+
+# Rate limiting + load shedding (added before CORS so rejections still carry CORS headers)
+from app.rate_limit import RateLimitMiddleware
+app.add_middleware(RateLimitMiddleware)
+
 # Setup CORS
 app.add_middleware(
     CORSMiddleware,
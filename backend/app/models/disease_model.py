@@ -15,6 +15,7 @@ class DiseaseDetectionResult(BaseModel):
     pesticide: str
     prevention: List[str]
     imageUrl: str
+    thumbnailUrl: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -28,6 +29,7 @@ class DetectionHistoryItem(BaseModel):
     pesticide: str
     prevention: List[str]
     imageUrl: str
+    thumbnailUrl: Optional[str] = None
     crop_hint: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
@@ -39,5 +41,6 @@ class DetectionHistoryResponse(BaseModel):
     confidence: float
     severity: str
     imageUrl: str
+    thumbnailUrl: str          # 256 px preview; the full image for older scans
     crop_hint: Optional[str] = None
     timestamp: datetime
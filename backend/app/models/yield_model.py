@@ -2,7 +2,7 @@
 Pydantic models for the Yield & Profit Prediction system.
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Annotated, Dict, Optional, List
 from datetime import datetime
 
 
@@ -14,6 +14,8 @@ class YieldPredictionRequest(BaseModel):
     unit: str = Field("acres", description="'acres' or 'hectares'")
     soilType: str = Field(..., description="Soil type")
     irrigation: bool = Field(False, description="Irrigation available?")
+    simulate: bool = Field(False, description="Run Monte Carlo weather/price risk simulation?")
+    scenarios: int = Field(10000, ge=100, le=20000, description="Number of simulated scenarios")
 
 
 class WeatherData(BaseModel):
@@ -22,6 +24,23 @@ class WeatherData(BaseModel):
     rainfall_forecast: float   # mm expected over crop season (mock)
     wind_speed: float
     description: str
+    source: str = "live"       # live | climatology (gridded normals, also behind yield tiles) | mock
+
+
+class YieldRiskSimulation(BaseModel):
+    """Monte Carlo distribution of outcomes around the point prediction."""
+    scenarios: int
+    profitP5: float                # ₹ — bad season
+    profitP25: float
+    profitP50: float
+    profitP75: float
+    profitP95: float               # ₹ — good season
+    meanProfit: float
+    lossProbability: float         # P(profit < 0), 0–1
+    yieldP5: float                 # tons
+    yieldP50: float
+    yieldP95: float
+    riskDistribution: Dict[str, float]   # share of scenarios per Low / Medium / High
 
 
 class YieldPredictionResult(BaseModel):
@@ -38,6 +57,90 @@ class YieldPredictionResult(BaseModel):
     landSize: float
     unit: str
     timestamp: Optional[datetime] = None
+    riskSimulation: Optional[YieldRiskSimulation] = None
+
+
+class YieldBatchRequest(BaseModel):
+    farms: List[YieldPredictionRequest] = Field(..., min_length=1, max_length=1000)
+
+
+class YieldBatchItem(BaseModel):
+    index: int                     # position in the submitted `farms` list
+    cropName: str
+    landSize: float
+    unit: str
+    predictedYield: float
+    yieldPerAcre: float
+    expectedRevenue: float
+    estimatedCost: float
+    expectedProfit: float
+    riskLevel: str
+    weatherSummary: str
+    weatherSource: str             # see WeatherData.source
+
+
+class YieldBatchResult(BaseModel):
+    results: List[YieldBatchItem]
+    totalExpectedProfit: float
+    weatherCellsFetched: int
+    timestamp: Optional[datetime] = None
+
+
+class CropComparisonRequest(BaseModel):
+    latitude: float = Field(..., description="Farm latitude")
+    longitude: float = Field(..., description="Farm longitude")
+    landSize: float = Field(..., gt=0, description="Land area")
+    unit: str = Field("acres", description="'acres' or 'hectares'")
+    soilType: str = Field(..., description="Soil type")
+    irrigation: bool = Field(False, description="Irrigation available?")
+
+
+class CropComparisonItem(BaseModel):
+    rank: int
+    crop: str                      # CROP_DB key
+    cropName: str
+    predictedYield: float
+    yieldPerAcre: float
+    expectedRevenue: float
+    estimatedCost: float
+    expectedProfit: float
+    riskLevel: str
+
+
+class CropComparisonResult(BaseModel):
+    crops: List[CropComparisonItem]   # best first
+    weatherSummary: str
+    weatherData: WeatherData
+    landSize: float
+    unit: str
+    timestamp: Optional[datetime] = None
+
+
+PositiveFloat = Annotated[float, Field(gt=0)]
+
+
+class SensitivityRequest(BaseModel):
+    latitude: float = Field(..., description="Farm latitude")
+    longitude: float = Field(..., description="Farm longitude")
+    unit: str = Field("acres", description="'acres' or 'hectares'")
+    crops: Optional[List[str]] = Field(None, description="Crops to include (default: all)")
+    landSizes: List[PositiveFloat] = Field([1, 2, 5, 10], min_length=1, max_length=50)
+    irrigation: List[bool] = Field([False, True], min_length=1, max_length=2)
+    soilTypes: List[str] = Field(["alluvial", "black", "clay", "red", "sandy"], min_length=1, max_length=5)
+    priceMultipliers: List[PositiveFloat] = Field([0.8, 1.0, 1.2], min_length=1, max_length=20)
+
+
+class SensitivityResult(BaseModel):
+    """
+    Profit matrix for charting: `expectedProfit[c][s][i][l][p]` indexed along
+    `axes` in order crop × soil × irrigation × landSize × priceMultiplier.
+    """
+    axes: Dict[str, list]
+    expectedProfit: list
+    riskLevel: List[List[List[str]]]    # crop × soil × irrigation (land/price don't affect risk)
+    weatherSummary: str
+    weatherSource: str                  # see WeatherData.source
+    cells: int
 
 
 class YieldHistoryRecord(BaseModel):
@@ -0,0 +1,220 @@
+"""
+Rate Limiting and Load Shedding
+--------------------------------
+ASGI middleware with two independent protections:
+
+1. Token buckets per client and route rule.  The client is the verified JWT
+   subject when a valid bearer token is present, otherwise the remote IP
+   (an unverifiable token never earns its own bucket; behind a proxy the
+   address comes from X-Forwarded-For, see `client_key`).  Each bucket is a
+   (tokens, last_refill) pair updated in O(1) on every request; the key
+   table is an LRU capped at RATE_LIMIT_MAX_KEYS, so memory stays bounded
+   however many clients appear.  An empty bucket answers 429 + Retry-After.
+
+2. A global concurrency limiter.  At most MAX_CONCURRENT_REQUESTS run at
+   once; up to MAX_QUEUED_REQUESTS more wait briefly for a slot.  Past that
+   depth, or after waiting QUEUE_TIMEOUT_SECONDS, requests are shed with
+   503 + Retry-After instead of queueing without bound.
+
+Long-lived streams (SSE) and health checks are exempt from the concurrency
+limit so they cannot starve it.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+from jose import JWTError, jwt
+
+from app.config import settings
+from app.services.auth_service import ALGORITHM
+
+QUEUE_TIMEOUT_SECONDS = 2.0
+
+
+class RateRule:
+    """`capacity` requests in a burst, refilled at `per_minute` per minute."""
+    __slots__ = ("name", "prefix", "methods", "capacity", "rate")
+
+    def __init__(self, name: str, prefix: str, per_minute: float, burst: Optional[int] = None,
+                 methods: Sequence[str] = ("POST",)):
+        self.name = name
+        self.prefix = prefix
+        self.methods = frozenset(methods)
+        self.capacity = float(burst if burst is not None else per_minute)
+        self.rate = per_minute / 60.0
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and path.startswith(self.prefix)
+
+
+# First match wins; the last rule is the catch-all.  Buckets are keyed by rule
+# name, so every rule needs its own name to get its own budget.
+DEFAULT_RULES = [
+    RateRule("login", "/auth/login", per_minute=10, burst=5),
+    RateRule("register", "/auth/register", per_minute=10, burst=5),
+    RateRule("google", "/auth/google", per_minute=20, burst=10),
+    RateRule("disease-batch", "/disease/detect-batch", per_minute=4, burst=2),
+    RateRule("disease", "/disease/detect", per_minute=20, burst=10),
+    RateRule("yield", "/yield/", per_minute=60, burst=20),
+    RateRule("default", "/", per_minute=300, burst=100, methods=("GET", "POST", "PUT", "PATCH", "DELETE")),
+]
+
+EXEMPT_PATHS = ("/health", "/docs", "/openapi.json")
+
+
+class TokenBucketLimiter:
+    def __init__(self, rules: Sequence[RateRule], max_keys: int):
+        self.rules = list(rules)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+        self.stats = {"allowed": 0, "limited": 0, "evicted": 0}
+
+    def rule_for(self, method: str, path: str) -> Optional[RateRule]:
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    def take(self, rule: RateRule, client: str, now: Optional[float] = None) -> float:
+        """Spend one token; returns 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        key = (rule.name, client)
+        tokens, last = self._buckets.pop(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + (now - last) * rule.rate)
+        if tokens >= 1.0:
+            tokens -= 1.0
+            wait = 0.0
+            self.stats["allowed"] += 1
+        else:
+            wait = (1.0 - tokens) / rule.rate
+            self.stats["limited"] += 1
+        self._buckets[key] = (tokens, now)          # re-inserted as most recent
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.stats["evicted"] += 1
+        return wait
+
+    @property
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float = QUEUE_TIMEOUT_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.stats = {"admitted": 0, "shed": 0}
+
+    async def acquire(self) -> bool:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        if self._slots.locked() and self.waiting >= self.max_queued:
+            self.stats["shed"] += 1
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["shed"] += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.stats["admitted"] += 1
+        return True
+
+    def release(self):
+        self._slots.release()
+
+
+def forwarded_client(scope, hops: int) -> Optional[str]:
+    """
+    The address the outermost of `hops` trusted proxies saw, from X-Forwarded-For.
+
+    Each proxy appends its peer, so only the rightmost `hops` entries are
+    trustworthy; anything left of them was written by the client.
+    """
+    entries = []
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            entries.extend(e.strip() for e in value.decode("latin-1").split(",") if e.strip())
+    if not entries:
+        return None
+    return entries[max(0, len(entries) - hops)]
+
+
+def client_key(scope) -> str:
+    """
+    `user:<sub>` for a valid bearer token, otherwise `ip:<address>`.
+
+    Behind a reverse proxy (Render) set TRUSTED_PROXY_HOPS to the number of
+    proxies that append to X-Forwarded-For.  scope["client"] is not used
+    then: uvicorn's --forwarded-allow-ips '*' rewrites it to the leftmost
+    entry, which the client chooses, so rotating that entry would reset the
+    bucket on every request.
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    sub = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+                    if sub:
+                        return f"user:{sub}"
+                except JWTError:
+                    pass
+            break
+    if settings.TRUSTED_PROXY_HOPS > 0:
+        address = forwarded_client(scope, settings.TRUSTED_PROXY_HOPS)
+        if address:
+            return f"ip:{address}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, rules: Sequence[RateRule] = DEFAULT_RULES):
+        self.app = app
+        self.limiter = TokenBucketLimiter(rules, settings.RATE_LIMIT_MAX_KEYS)
+        self.concurrency = ConcurrencyLimiter(settings.MAX_CONCURRENT_REQUESTS, settings.MAX_QUEUED_REQUESTS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+        path, method = scope["path"], scope["method"]
+        if method == "OPTIONS" or path.startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+
+        rule = self.limiter.rule_for(method, path)
+        if rule is not None:
+            wait = self.limiter.take(rule, client_key(scope))
+            if wait > 0:
+                return await _reject(send, 429, "Too many requests, please slow down.", wait)
+
+        if path.endswith("/events"):
+            return await self.app(scope, receive, send)
+        if not await self.concurrency.acquire():
+            return await _reject(send, 503, "Server is busy, please retry shortly.", self.concurrency.queue_timeout)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.concurrency.release()
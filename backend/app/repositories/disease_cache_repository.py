@@ -0,0 +1,26 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from app.repositories.indexes import ensure_ttl_index
+
+
+class DiseaseCacheRepository:
+    """Analysis results keyed by image SHA-256; Mongo expires them via a TTL index."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db["disease_analysis_cache"]
+
+    async def ensure_indexes(self, ttl_seconds: int):
+        await ensure_ttl_index(self.collection, "created_at", ttl_seconds)
+
+    async def get(self, key: str) -> Optional[dict]:
+        doc = await self.collection.find_one({"_id": key})
+        return doc["result"] if doc else None
+
+    async def put(self, key: str, result: Dict[str, Any]):
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "result": result, "created_at": datetime.utcnow()},
+            upsert=True,
+        )
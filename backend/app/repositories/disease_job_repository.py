@@ -0,0 +1,44 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from app.repositories.indexes import ensure_ttl_index
+
+UNFINISHED = ["queued", "running"]
+
+
+class DiseaseJobRepository:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db["disease_jobs"]
+
+    async def ensure_indexes(self, ttl_seconds: int):
+        await self.collection.create_index("status")
+        await self.collection.create_index([("user_email", 1), ("created_at", -1)])
+        await ensure_ttl_index(self.collection, "created_at", ttl_seconds)
+
+    async def create_job(self, job_data: Dict[str, Any]) -> str:
+        job_data["created_at"] = datetime.utcnow()
+        job_data["updated_at"] = datetime.utcnow()
+        result = await self.collection.insert_one(job_data)
+        return str(result.inserted_id)
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        if not ObjectId.is_valid(job_id):
+            return None
+        job = await self.collection.find_one({"_id": ObjectId(job_id)})
+        if job:
+            job["_id"] = str(job["_id"])
+        return job
+
+    async def update_job(self, job_id: str, fields: Dict[str, Any]):
+        fields["updated_at"] = datetime.utcnow()
+        await self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": fields})
+
+    async def requeue_unfinished(self) -> List[str]:
+        """Jobs interrupted by a restart go back to `queued`; returns their ids, oldest first."""
+        await self.collection.update_many(
+            {"status": "running"}, {"$set": {"status": "queued", "updated_at": datetime.utcnow()}}
+        )
+        cursor = self.collection.find({"status": {"$in": UNFINISHED}}, {"_id": 1}).sort("created_at", 1)
+        return [str(doc["_id"]) async for doc in cursor]
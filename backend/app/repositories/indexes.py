@@ -0,0 +1,17 @@
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+
+async def ensure_ttl_index(collection: AsyncIOMotorCollection, field: str, ttl_seconds: int):
+    """
+    Create a TTL index on `field`, or retune an existing one with collMod —
+    create_index with a different expireAfterSeconds raises IndexOptionsConflict.
+    """
+    for name, spec in (await collection.index_information()).items():
+        if spec.get("key") == [(field, 1)]:
+            if spec.get("expireAfterSeconds") != ttl_seconds:
+                await collection.database.command(
+                    "collMod", collection.name,
+                    index={"name": name, "expireAfterSeconds": ttl_seconds},
+                )
+            return
+    await collection.create_index(field, expireAfterSeconds=ttl_seconds)
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from app.models.user_model import UserCreate, UserResponse, Token, GoogleLogin, UserInDB
 from app.repositories.user_repository import UserRepository
-from app.services.auth_service import AuthService, ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
+from app.services.principal_cache import principal_cache
+from app.services.auth_service import AuthService, HashPoolBusyError, ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
 from app.database import db
 from app.config import settings
 from datetime import datetime, timedelta
@@ -21,12 +22,23 @@ def get_user_repository():
 def get_auth_service():
     return AuthService()
 
+def hash_pool_busy(exc: HashPoolBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "1"},
+    )
+
 async def get_current_user(token: str = Depends(oauth2_scheme), user_repo: UserRepository = Depends(get_user_repository)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -39,7 +51,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), user_repo: UserR
     if user is None:
         raise credentials_exception
     
-    return UserInDB(**user)
+    principal = UserInDB(**user)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
@@ -55,7 +69,10 @@ async def register(
     user_dict = user_data.dict()
     
     if user_dict.get('password'):
-        user_dict['hashed_password'] = auth_service.get_password_hash(user_dict.pop('password'))
+        try:
+            user_dict['hashed_password'] = await auth_service.get_password_hash_async(user_dict.pop('password'))
+        except HashPoolBusyError as e:
+            raise hash_pool_busy(e)
     
     new_user = await user_repo.create_user(user_dict)
     return UserResponse(
@@ -79,7 +96,11 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not auth_service.verify_password(form_data.password, user["hashed_password"]):
+    try:
+        password_ok = await auth_service.verify_password_async(form_data.password, user["hashed_password"])
+    except HashPoolBusyError as e:
+        raise hash_pool_busy(e)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -108,7 +129,7 @@ async def google_auth(
 ):
     try:
         # Verify the token
-        idinfo = auth_service.verify_google_token(google_login.credential)
+        idinfo = await auth_service.verify_google_token(google_login.credential)
         
         email = idinfo['email']
         name = idinfo.get('name', '')
@@ -2,89 +2,203 @@
 Disease Detection Routes
 --------------------------
 POST /disease/detect   — upload a leaf image, receive AI disease analysis
+POST /disease/detect?async=true — queue the analysis, returns a job id (202)
+POST /disease/detect-batch — analyse up to 50 images, results streamed as NDJSON
+GET  /disease/jobs/{id}        — job status and result
+GET  /disease/jobs/{id}/events — job status changes as Server-Sent Events
 GET  /disease/history  — get paginated detection history for the current user
+GET  /disease/cache/stats — analysis-cache hit counters
+GET  /disease/images/{key} — locally stored leaf image (public, ETag + Range)
 """
+import asyncio
+import json
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 
+import anyio
 from bson import ObjectId
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
 from app.database import get_db
 from app.models.disease_model import DetectionHistoryResponse, DiseaseDetectionResult
+from app.repositories.disease_job_repository import DiseaseJobRepository
 from app.routes.auth import get_current_user
 from app.services import disease_service
+from app.services.blob_store import MEDIA_TYPES, absolute_url, absolute_urls, blob_store
+from app.services.disease_cache import disease_cache
+from app.services.disease_jobs import TERMINAL, QueueFullError, disease_jobs, public_job
+
 
 router = APIRouter(prefix="/disease", tags=["Disease Detection"])
 
 # ── Allowed image MIME types ──────────────────────────────────────────────────
 ALLOWED_TYPES = {"image/jpeg", "image/png", "image/webp", "image/heic", "image/heif"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+MAX_BATCH_FILES = 50
+MULTIPART_OVERHEAD = 64 * 1024    # boundaries, part headers and form fields
+# Enforced by BodySizeLimitMiddleware before Starlette spools the body
+UPLOAD_BODY_LIMITS = {
+    "/disease/detect-batch": MAX_BATCH_FILES * (MAX_FILE_SIZE + MULTIPART_OVERHEAD),
+    "/disease/detect": MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+}
+BATCH_CONCURRENCY = 8
+SSE_HEARTBEAT_SECONDS = 15
 
 
-@router.post("/detect", response_model=DiseaseDetectionResult, status_code=status.HTTP_200_OK)
-async def detect_disease(
-    file: UploadFile = File(..., description="Leaf image (JPEG / PNG / WebP, max 10 MB)"),
-    crop_hint: Optional[str] = Form(None, description="Optional crop type hint (e.g. wheat, rice)"),
-    current_user=Depends(get_current_user),
-    db=Depends(get_db),
-):
-    """
-    Upload a leaf photo → get disease name, confidence, severity, treatment & prevention.
-    The scan is saved to the user's detection history in MongoDB.
-    """
-    # ── Validation ─────────────────────────────────────────────────────────
+async def _read_image(file: UploadFile) -> disease_service.LeafImage:
+    """Validate type and size while streaming the upload in."""
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Unsupported file type '{file.content_type}'. Upload JPEG, PNG or WebP.",
         )
 
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
+    try:
+        image = await disease_service.read_upload(file, MAX_FILE_SIZE)
+    except disease_service.ImageTooLargeError:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail="Image exceeds the 10 MB limit. Please compress and retry.",
         )
-    if len(file_bytes) == 0:
+    if image.size == 0:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Uploaded file is empty.",
         )
+    return image
 
-    # ── Upload + Analyse ────────────────────────────────────────────────────
+
+async def _analyze(image: disease_service.LeafImage, crop_hint: Optional[str], db) -> dict:
     try:
-        image_url = await disease_service.upload_image(file_bytes, file.filename or "leaf.jpg")
-        result = await disease_service.analyze_disease(file_bytes, image_url, crop_hint)
+        return await disease_service.analyze_cached(image, crop_hint, db)
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Analysis failed: {str(exc)}",
         )
 
+
+@router.post("/detect", response_model=DiseaseDetectionResult, status_code=status.HTTP_200_OK)
+async def detect_disease(
+    request: Request,
+    file: UploadFile = File(..., description="Leaf image (JPEG / PNG / WebP, max 10 MB)"),
+    crop_hint: Optional[str] = Form(None, description="Optional crop type hint (e.g. wheat, rice)"),
+    async_mode: bool = Query(False, alias="async", description="Queue the analysis and return a job id"),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    Upload a leaf photo → get disease name, confidence, severity, treatment & prevention.
+    The scan is saved to the user's detection history in MongoDB.
+
+    With `?async=true` the analysis is queued instead: the response is 202
+    with a job id to poll (`/disease/jobs/{id}`) or subscribe to (`…/events`).
+    """
+    image = await _read_image(file)
+
+    if async_mode:
+        try:
+            job_id = await disease_jobs.submit(image, crop_hint, current_user.email)
+        except QueueFullError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"{exc} Please retry shortly.",
+                headers={"Retry-After": str(disease_jobs.retry_after_seconds())},
+            )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "jobId": job_id,
+                "status": "queued",
+                "statusUrl": f"/disease/jobs/{job_id}",
+                "eventsUrl": f"/disease/jobs/{job_id}/events",
+            },
+        )
+
+    result = await _analyze(image, crop_hint, db)
+
     # ── Persist history in MongoDB ──────────────────────────────────────────
-    history_doc = {
-        "user_email": current_user.email,
-        "diseaseName": result["diseaseName"],
-        "confidence": result["confidence"],
-        "severity": result["severity"],
-        "treatment": result["treatment"],
-        "pesticide": result["pesticide"],
-        "prevention": result["prevention"],
-        "imageUrl": result["imageUrl"],
-        "crop_hint": crop_hint,
-        "timestamp": datetime.utcnow(),
-    }
     try:
-        await db["disease_detections"].insert_one(history_doc)
+        await db["disease_detections"].insert_one(disease_service.history_doc(current_user.email, result, crop_hint))
     except Exception:
         pass  # History write failure must not block the response
 
-    return DiseaseDetectionResult(**result)
+    return DiseaseDetectionResult(**absolute_urls(result, str(request.base_url)))
+
+
+@router.post("/detect-batch")
+async def detect_disease_batch(
+    request: Request,
+    files: List[UploadFile] = File(..., description=f"Up to {MAX_BATCH_FILES} leaf images from one plot"),
+    crop_hint: Optional[str] = Form(None, description="Optional crop type hint applied to every image"),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    Analyse a plot's worth of leaf photos in one request.  Images are analysed
+    with bounded concurrency and streamed back as NDJSON in completion order,
+    one line per image (`index` is its position in the upload):
+
+        {"index": 3, "filename": "leaf3.jpg", "status": 200, "result": {...}}
+        {"index": 0, "filename": "leaf0.gif", "status": 422, "detail": "..."}
+
+    At most BATCH_CONCURRENCY uploads are read and analysed at a time, so only
+    those images are held in memory; the rest stay in the form's spooled temp
+    files (closed only after the response finishes).  History for the
+    successful scans is written with a single insert_many when the stream
+    ends — including when the client disconnects, which also cancels the
+    scans still pending.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BATCH_FILES} images per batch.",
+        )
+
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+    base = str(request.base_url)
+
+    async def scan(index: int, file: UploadFile) -> Tuple[dict, Optional[dict]]:
+        """(NDJSON line, history document or None) for one upload."""
+        line = {"index": index, "filename": file.filename}
+        try:
+            async with slots:
+                image = await _read_image(file)
+                result = await _analyze(image, crop_hint, db)
+        except HTTPException as exc:
+            return {**line, "status": exc.status_code, "detail": exc.detail}, None
+        doc = disease_service.history_doc(current_user.email, result, crop_hint)
+        result = DiseaseDetectionResult(**absolute_urls(result, base)).model_dump(mode="json")
+        return {**line, "status": 200, "result": result}, doc
+
+    async def stream():
+        tasks = [asyncio.create_task(scan(i, file)) for i, file in enumerate(files)]
+        history = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line, doc = await next_done
+                if doc is not None:
+                    history.append(doc)
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client disconnected (or the stream failed): stop the scans still pending
+            for task in tasks:
+                task.cancel()
+            # One write for every scan that finished, shielded from the disconnect's cancellation
+            if history:
+                with anyio.CancelScope(shield=True):
+                    try:
+                        await db["disease_detections"].insert_many(history, ordered=False)
+                    except Exception:
+                        pass  # History write failure must not block the response
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @router.get("/history", response_model=list[DetectionHistoryResponse])
 async def get_detection_history(
+    request: Request,
     limit: int = 20,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
@@ -97,6 +211,7 @@ async def get_detection_history(
         .limit(max(1, min(limit, 100)))
     )
 
+    base = str(request.base_url)
     history = []
     async for doc in cursor:
         history.append(
@@ -105,9 +220,83 @@ async def get_detection_history(
                 diseaseName=doc["diseaseName"],
                 confidence=doc["confidence"],
                 severity=doc["severity"],
-                imageUrl=doc["imageUrl"],
+                imageUrl=absolute_url(doc["imageUrl"], base),
+                thumbnailUrl=absolute_url(doc.get("thumbnailUrl") or doc["imageUrl"], base),
                 crop_hint=doc.get("crop_hint"),
                 timestamp=doc["timestamp"],
             )
         )
     return history
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(current_user=Depends(get_current_user)):
+    """Hits per tier (memory / mongo), misses and hit rate of the analysis cache."""
+    return disease_cache.stats()
+
+
+@router.get("/images/{key}")
+async def get_image(key: str, request: Request):
+    """
+    Serve a stored leaf image.  Keys are content hashes, so the ETag never
+    changes and clients may cache forever; Range requests return 206.
+    """
+    path = blob_store.find(key)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found.")
+
+    etag = f'"{key.split(".", 1)[0]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    media_type = MEDIA_TYPES[key.rsplit(".", 1)[1]]
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+async def _get_own_job(job_id: str, current_user, db) -> dict:
+    job = await DiseaseJobRepository(db).get_job(job_id)
+    if job is None or job["user_email"] != current_user.email:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request, current_user=Depends(get_current_user), db=Depends(get_db)):
+    """Current status of an async analysis job; `result` is set once status is "done"."""
+    return public_job(await _get_own_job(job_id, current_user, db), str(request.base_url))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, current_user=Depends(get_current_user),
+                            db=Depends(get_db)):
+    """
+    Server-Sent Events: the current job state immediately, then one `job`
+    event per status change until it is done or failed.
+    """
+    await _get_own_job(job_id, current_user, db)
+    # Subscribe before re-reading so no transition between the two is missed
+    events = disease_jobs.subscribe(job_id)
+    base = str(request.base_url)
+
+    async def stream():
+        try:
+            job = public_job(await DiseaseJobRepository(db).get_job(job_id), base)
+            while True:
+                yield f"event: job\ndata: {json.dumps(job)}\n\n"
+                if job["status"] in TERMINAL:
+                    return
+                while True:
+                    try:
+                        job = public_job(await asyncio.wait_for(events.get(), timeout=SSE_HEARTBEAT_SECONDS), base)
+                        break
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+        finally:
+            disease_jobs.unsubscribe(job_id, events)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
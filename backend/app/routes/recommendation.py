@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.services.recommendation_engine import RecommendationEngine
 from fastapi import Depends
 from app.routes.auth import get_current_user
@@ -11,7 +11,24 @@ class RecommendationRequest(BaseModel):
     crop: str
     location: str
 
+class HarvestPlanRequest(BaseModel):
+    crop: str
+    location: str
+    storage_type: str = "warehouse"
+    horizon_days: int = Field(14, ge=1, le=14)
+    alternatives: int = Field(3, ge=0, le=10)
+
 @router.post("/")
 async def recommend_market(request: RecommendationRequest, current_user=Depends(get_current_user)):
     result = await service.recommend_market(request.crop, request.location)
     return result
+
+
+@router.post("/harvest-plan")
+async def plan_harvest_and_sale(request: HarvestPlanRequest, current_user=Depends(get_current_user)):
+    """When to harvest/sell and where: best (sell day, mandi) over the forecast horizon."""
+    result = await service.plan_harvest_and_sale(
+        request.crop, request.location, request.storage_type,
+        request.horizon_days, request.alternatives,
+    )
+    return result
@@ -1,12 +1,21 @@
-from fastapi import APIRouter
+import io
+import itertools
+import json
+import math
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
 from app.services.spoilage_model import SpoilageModel
+from app.services.weather_service import WeatherService, get_city_coords
 from fastapi import Depends
 from app.routes.auth import get_current_user
 
 router = APIRouter(prefix="/spoilage-risk", tags=["Spoilage Risk"])
 service = SpoilageModel()
+weather_service = WeatherService()
 
 class SpoilageRequest(BaseModel):
     temperature: float
@@ -15,6 +24,17 @@ class SpoilageRequest(BaseModel):
     transit_days: int = 3
     crop: Optional[str] = "default"
 
+class TrajectoryRequest(BaseModel):
+    # Either supply the series …
+    temperatures: Optional[List[float]] = None
+    humidities: Optional[List[float]] = None
+    step_hours: float = 1.0
+    # … or a location, and the hourly forecast for the next transit_days is used
+    location: Optional[str] = None
+    transit_days: float = 3
+    storage_type: str = "warehouse"
+    crop: Optional[str] = "default"
+
 @router.post("/")
 async def calculate_spoilage_risk(request: SpoilageRequest, current_user=Depends(get_current_user)):
     result = await service.calculate_risk(
@@ -25,3 +45,198 @@ async def calculate_spoilage_risk(request: SpoilageRequest, current_user=Depends
         crop=request.crop or "default",
     )
     return result
+
+
+MAX_TRAJECTORY_STEPS = 24 * 60
+
+@router.post("/trajectory")
+async def calculate_spoilage_trajectory(request: TrajectoryRequest, current_user=Depends(get_current_user)):
+    """Spoilage risk integrated over a time-varying temperature/humidity route."""
+    if request.temperatures is not None:
+        temps, hums = request.temperatures, request.humidities
+        if hums is None or len(hums) != len(temps) or not temps:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="temperatures and humidities must be non-empty and the same length.",
+            )
+        if len(temps) > MAX_TRAJECTORY_STEPS or request.step_hours <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Provide at most {MAX_TRAJECTORY_STEPS} steps with a positive step_hours.",
+            )
+        step_hours, source = request.step_hours, "supplied"
+    elif request.location:
+        (lat, lon), _ = get_city_coords(request.location)
+        hours = max(1, int(math.ceil(request.transit_days * 24)))
+        window, source = await weather_service.get_forecast_window(lat, lon, hours)
+        if window.shape[1] < hours:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"The hourly forecast covers only the next {window.shape[1]} hours; "
+                       "supply temperatures/humidities for longer transits.",
+            )
+        temps, hums = window[0], window[1]
+        step_hours = 1.0
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide either temperatures/humidities or a location.",
+        )
+
+    result = service.calculate_risk_trajectory(
+        temperatures=temps,
+        humidities=hums,
+        storage_type=request.storage_type,
+        crop=request.crop or "default",
+        step_hours=step_hours,
+    )
+    result["weather_source"] = source
+    return result
+
+
+# ── Batch scoring ─────────────────────────────────────────────────────────────
+MAX_BATCH_ROWS = 200_000
+# Generous for a JSON object with every column and a long id (a typical row is ~110 bytes)
+MAX_BATCH_ROW_BYTES = 256
+# Enforced by BodySizeLimitMiddleware before the body is buffered (~49 MiB)
+UPLOAD_BODY_LIMITS = {
+    "/spoilage-risk/batch": MAX_BATCH_ROWS * MAX_BATCH_ROW_BYTES,
+}
+STREAM_CHUNK_ROWS = 2_000
+BATCH_DEFAULTS = {"storage_type": "warehouse", "transit_days": 3, "crop": "default"}
+BATCH_NUMERIC_FIELDS = ["temperature", "humidity", "transit_days"]
+BATCH_OUTPUT_FIELDS = [
+    "spoilage_probability", "probability_pct", "risk_level",
+    "estimated_value_loss_pct", "daily_loss_pct",
+]
+
+
+async def _read_shipments(request: Request) -> Tuple[Iterator[pd.DataFrame], int]:
+    """
+    Split a JSON array, NDJSON, CSV body or multipart CSV/NDJSON upload into
+    frames of STREAM_CHUNK_ROWS.  CSV and NDJSON are parsed lazily, chunk by
+    chunk, as the response streams; the returned count is an upper bound on rows.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or not hasattr(upload, "read"):
+            raise ValueError("Multipart upload must include a 'file' field.")
+        raw = await upload.read()
+        name = (upload.filename or "").lower()
+        is_csv = name.endswith(".csv") or upload.content_type == "text/csv"
+    else:
+        raw = await request.body()
+        is_csv = "csv" in content_type
+        if "application/json" in content_type:
+            payload = json.loads(raw or b"[]")
+            rows = payload.get("shipments", []) if isinstance(payload, dict) else payload
+            if not isinstance(rows, list):
+                raise ValueError("Expected a JSON array of shipments.")
+            chunks = (pd.DataFrame(rows[i:i + STREAM_CHUNK_ROWS]) for i in range(0, len(rows), STREAM_CHUNK_ROWS))
+            return chunks, len(rows)
+
+    if not raw.strip():
+        return iter(()), 0
+    lines = raw.count(b"\n") + (not raw.endswith(b"\n"))
+    if is_csv:
+        return iter(pd.read_csv(io.BytesIO(raw), chunksize=STREAM_CHUNK_ROWS)), lines - 1
+    return iter(pd.read_json(io.BytesIO(raw), lines=True, chunksize=STREAM_CHUNK_ROWS)), lines
+
+
+def _score_chunk(df: pd.DataFrame, first_id: int, use_tables: bool) -> pd.DataFrame:
+    """Score one frame; rows with missing or non-numeric inputs get an `error` instead of a result."""
+    for col, default in BATCH_DEFAULTS.items():
+        df[col] = df[col].fillna(default) if col in df.columns else default
+    numeric = {
+        col: pd.to_numeric(df[col], errors="coerce") if col in df.columns else pd.Series(np.nan, index=df.index)
+        for col in BATCH_NUMERIC_FIELDS
+    }
+    invalid = pd.DataFrame({col: values.isna() for col, values in numeric.items()})
+    valid = ~invalid.any(axis=1).to_numpy()
+
+    out = pd.DataFrame(index=range(len(df)), columns=["id", *BATCH_OUTPUT_FIELDS, "error"], dtype=object)
+    positions = pd.Series(range(first_id, first_id + len(df)), dtype=object)
+    out["id"] = df["id"].astype(object).where(df["id"].notna(), positions) if "id" in df.columns else positions
+    if valid.any():
+        result = service.calculate_risk_batch(
+            temperature=numeric["temperature"].to_numpy(dtype=float)[valid],
+            humidity=numeric["humidity"].to_numpy(dtype=float)[valid],
+            storage_type=df["storage_type"].astype(str).to_numpy()[valid],
+            transit_days=numeric["transit_days"].to_numpy(dtype=float)[valid],
+            crop=df["crop"].astype(str).to_numpy()[valid],
+            use_tables=use_tables,
+        )
+        for field in BATCH_OUTPUT_FIELDS:
+            out.loc[valid, field] = result[field]
+    if not valid.all():
+        bad = invalid.to_numpy()[~valid]
+        out.loc[~valid, "error"] = [
+            "missing or non-numeric " + ", ".join(c for c, flag in zip(BATCH_NUMERIC_FIELDS, row) if flag)
+            for row in bad
+        ]
+    return out
+
+
+@router.post("/batch")
+async def calculate_spoilage_risk_batch(
+    request: Request,
+    output_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    interpolate: bool = False,
+    current_user=Depends(get_current_user),
+):
+    """
+    Score many shipments in one vectorised pass per chunk.
+
+    Accepts a JSON array (or {"shipments": [...]}), an NDJSON / CSV body, or a
+    multipart upload named `file`. Columns: temperature, humidity and optional
+    storage_type, transit_days, crop, id. Results stream back as NDJSON (or
+    CSV with `?format=csv`) in input order; a row whose numeric fields are
+    missing or unparseable carries an `error` and no scores.  Bodies larger
+    than MAX_BATCH_ROWS × MAX_BATCH_ROW_BYTES are refused with 413 before
+    they are read.
+    `?interpolate=true` reads the probabilities from the precomputed lookup
+    tables instead of the exact formula.
+    """
+    try:
+        chunks, row_bound = await _read_shipments(request)
+        if row_bound > MAX_BATCH_ROWS + 1:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch exceeds {MAX_BATCH_ROWS} shipments. Split the file and retry.",
+            )
+        first = next(chunks, None)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Could not parse shipments: {exc}")
+
+    missing = {"temperature", "humidity"} - set(first.columns if first is not None else ())
+    if first is None or first.empty or missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Missing required column(s): {', '.join(sorted(missing))}" if first is not None and missing
+            else "No shipments supplied.",
+        )
+
+    def stream():
+        offset = 0
+        try:
+            for df in itertools.chain([first], chunks):
+                if offset + len(df) > MAX_BATCH_ROWS:
+                    raise ValueError(f"Batch exceeds {MAX_BATCH_ROWS} shipments")
+                out = _score_chunk(df.reset_index(drop=True), offset, interpolate)
+                if output_format == "csv":
+                    yield out.to_csv(index=False, header=(offset == 0))
+                else:
+                    lines = out.to_json(orient="records", lines=True)
+                    yield lines if lines.endswith("\n") else lines + "\n"
+                offset += len(df)
+        except ValueError as exc:
+            # Malformed input past the first chunk: the status is already sent
+            message = f"Stopped after {offset} shipments: {exc}"
+            yield f"# {message}\n" if output_format == "csv" else json.dumps({"error": message}) + "\n"
+
+    media_type = "text/csv" if output_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.services.weather_service import WeatherService
+from app.services.weather_service import WeatherService, get_city_coords
 
 router = APIRouter(prefix="/weather", tags=["Weather"])
 service = WeatherService()
@@ -8,3 +8,19 @@ service = WeatherService()
 async def get_weather(location: str):
     result = await service.get_weather(location)
     return result
+
+@router.get("/hourly")
+async def get_hourly_forecast(location: str, days: int = 16):
+    (lat, lon), resolved_city = get_city_coords(location)
+    forecast = await service.get_hourly_forecast(lat, lon, days)
+    hours = min(forecast.hours, max(1, min(days, service.MAX_FORECAST_DAYS)) * 24)
+    return {
+        "resolved_city": resolved_city,
+        "lat": lat,
+        "lon": lon,
+        "start": forecast.start,
+        "interval_seconds": 3600,
+        "temperature": forecast.temperature(0, hours).round(1).tolist(),
+        "humidity": forecast.humidity(0, hours).round(1).tolist(),
+        "source": forecast.source,
+    }
@@ -2,7 +2,10 @@
 Routes for the Yield & Profit Prediction feature.
 
 Endpoints:
-  POST /yield/predict  — run prediction, save to MongoDB
+  POST /yield/predict        — run prediction, save to MongoDB
+  POST /yield/predict-batch  — many farms in one vectorised pass, one insert_many
+  POST /yield/compare        — rank every supported crop for one farm
+  POST /yield/sensitivity    — what-if profit grid over land / irrigation / soil / price
   GET  /yield/history  — user's past predictions (newest first)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -13,9 +16,15 @@ from bson import ObjectId
 from app.models.yield_model import (
     YieldPredictionRequest,
     YieldPredictionResult,
+    YieldBatchRequest,
+    YieldBatchResult,
+    CropComparisonRequest,
+    CropComparisonResult,
+    SensitivityRequest,
+    SensitivityResult,
     YieldHistoryResponse,
 )
-from app.services.yield_service import predict_yield
+from app.services.yield_service import predict_yield, predict_yield_batch, compare_crops, sensitivity_grid
 from app.routes.auth import get_current_user
 from app.database import get_db
 
@@ -66,6 +75,90 @@ async def predict_yield_route(
     return result
 
 
+@router.post("/predict-batch", response_model=YieldBatchResult)
+async def predict_yield_batch_route(
+    req: YieldBatchRequest,
+    current_user=Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """
+    Run yield & profit predictions for many farm plots (e.g. a village survey).
+    Weather is fetched once per farm location; all results are saved in one write.
+    `simulate` is rejected here — run simulations through /yield/predict.
+    """
+    try:
+        batch = await predict_yield_batch(req.farms)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch prediction failed: {str(e)}",
+        )
+
+    # ── Persist to MongoDB (single round trip) ──
+    now = datetime.utcnow()
+    records = [
+        {
+            "user_email": current_user.email,
+            "cropName": item.cropName,
+            "landSize": item.landSize,
+            "unit": item.unit,
+            "predictedYield": item.predictedYield,
+            "yieldPerAcre": item.yieldPerAcre,
+            "expectedRevenue": item.expectedRevenue,
+            "estimatedCost": item.estimatedCost,
+            "expectedProfit": item.expectedProfit,
+            "riskLevel": item.riskLevel,
+            "latitude": farm.latitude,
+            "longitude": farm.longitude,
+            "soilType": farm.soilType,
+            "irrigation": farm.irrigation,
+            "weatherSummary": item.weatherSummary,
+            "timestamp": now,
+        }
+        for item, farm in zip(batch.results, req.farms)
+    ]
+    await db["yield_predictions"].insert_many(records, ordered=False)
+
+    return batch
+
+
+@router.post("/compare", response_model=CropComparisonResult)
+async def compare_crops_route(
+    req: CropComparisonRequest,
+    current_user=Depends(get_current_user),
+):
+    """
+    "What should I plant here?" — evaluate every crop for this farm in one pass,
+    ranked by expected profit. Exploratory, so nothing is written to history.
+    """
+    try:
+        return await compare_crops(req)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Crop comparison failed: {str(e)}",
+        )
+
+
+@router.post("/sensitivity", response_model=SensitivityResult)
+async def sensitivity_route(
+    req: SensitivityRequest,
+    current_user=Depends(get_current_user),
+):
+    """What-if analysis: profit across the full parameter grid, for charting."""
+    try:
+        return await sensitivity_grid(req)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Sensitivity analysis failed: {str(e)}",
+        )
+
+
 @router.get("/history", response_model=list[YieldHistoryResponse])
 async def get_yield_history(
     limit: int = 20,
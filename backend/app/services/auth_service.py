@@ -1,10 +1,12 @@
+import asyncio
 import bcrypt
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 from app.config import settings
+from app.services.google_certs import google_certs
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
@@ -14,6 +16,41 @@ SECRET_KEY = settings.SECRET_KEY
 GOOGLE_CLIENT_ID = settings.GOOGLE_CLIENT_ID
 
 
+class HashPoolBusyError(Exception):
+    """Raised when more password hashes are waiting than the pool allows."""
+
+
+class BoundedHashPool:
+    """
+    bcrypt takes ~100–300 ms of CPU and releases the GIL, so it runs on a few
+    dedicated threads instead of the event loop.  At most `max_queue` calls may
+    wait behind the busy workers; beyond that callers are rejected at once
+    rather than piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0
+
+    async def run(self, fn, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            raise HashPoolBusyError("Authentication is busy, please retry shortly.")
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+
+hash_pool = BoundedHashPool(settings.AUTH_HASH_WORKERS, settings.AUTH_HASH_MAX_QUEUE)
+
+
 class AuthService:
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(
@@ -25,20 +62,25 @@ class AuthService:
         salt = bcrypt.gensalt()
         return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """`verify_password` on the bcrypt pool; raises HashPoolBusyError when saturated."""
+        return await hash_pool.run(self.verify_password, plain_password, hashed_password)
+
+    async def get_password_hash_async(self, password: str) -> str:
+        """`get_password_hash` on the bcrypt pool; raises HashPoolBusyError when saturated."""
+        return await hash_pool.run(self.get_password_hash, password)
+
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         to_encode = data.copy()
         expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
         to_encode.update({"exp": expire})
         return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-    def verify_google_token(self, token: str) -> dict:
-        """Verify a Google ID token and return the user payload."""
+    async def verify_google_token(self, token: str) -> dict:
+        """Verify a Google ID token against the cached signing certs and return the user payload."""
         try:
-            idinfo = id_token.verify_oauth2_token(
-                token,
-                google_requests.Request(),
-                GOOGLE_CLIENT_ID,
-            )
-            return idinfo
+            return await google_certs.verify(token, GOOGLE_CLIENT_ID)
         except ValueError as e:
             raise ValueError(f"Invalid Google token: {e}")
+        except httpx.HTTPError as e:
+            raise ValueError(f"Could not fetch Google signing keys: {e}")
@@ -0,0 +1,172 @@
+"""
+Local Content-Addressed Blob Store
+-----------------------------------
+Leaf images are stored on disk once per unique SHA-256, in sharded
+directories so no single directory grows large:
+
+    <BLOB_STORE_DIR>/ab/cd/abcd…ef.jpg
+    <BLOB_STORE_DIR>/ab/cd/abcd…ef_thumb.webp     (see thumbnails.py)
+
+Writes go to a temp file and are moved into place with `os.replace`, so a
+reader never sees a partial image.  MongoDB keeps only the short image URL
+(`/disease/images/<sha256>.<ext>`) instead of a base64 data URL; responses
+make it absolute with `absolute_url` (PUBLIC_BASE_URL, else the base URL of
+the request being answered), so the separately hosted frontend receives
+absolute URLs without any host being persisted.  On Render, BLOB_STORE_DIR
+must sit on the persistent disk (see render.yaml) or images vanish on each
+deploy.
+
+Existing history documents holding `data:` URLs are converted with:
+
+    python -m app.services.blob_store migrate
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+KEY_PATTERN = re.compile(r"^(?P<sha>[0-9a-f]{64})(?:_thumb)?\.(?P<ext>jpg|png|webp|heic|heif)$")
+IMAGE_ROUTE = "/disease/images"
+
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/heic": "heic",
+    "image/heif": "heif",
+}
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "heic": "image/heic",
+    "heif": "image/heif",
+}
+
+
+def extension_for(content_type: Optional[str], filename: str = "") -> str:
+    """Normalised file extension from the MIME type, else the filename, else jpg."""
+    if content_type in EXTENSIONS:
+        return EXTENSIONS[content_type]
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    ext = "jpg" if ext == "jpeg" else ext
+    return ext if ext in MEDIA_TYPES else "jpg"
+
+
+def blob_url(key: str) -> str:
+    """Short, host-independent URL stored in MongoDB."""
+    return f"{IMAGE_ROUTE}/{key}"
+
+
+def absolute_url(url: Optional[str], request_base: str = "") -> Optional[str]:
+    """Prefix a stored short image URL with PUBLIC_BASE_URL, else `request_base`."""
+    if url and url.startswith(IMAGE_ROUTE + "/"):
+        return f"{(settings.PUBLIC_BASE_URL or request_base).rstrip('/')}{url}"
+    return url
+
+
+def absolute_urls(result: dict, request_base: str = "") -> dict:
+    """Copy of an analysis result with its image and thumbnail URLs made absolute."""
+    return {
+        **result,
+        "imageUrl": absolute_url(result.get("imageUrl"), request_base),
+        "thumbnailUrl": absolute_url(result.get("thumbnailUrl"), request_base),
+    }
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def find(self, key: str) -> Optional[Path]:
+        """Path of a stored blob, or None for an unknown or malformed key."""
+        if not KEY_PATTERN.match(key):
+            return None
+        path = self.path_for(key)
+        return path if path.is_file() else None
+
+    def put(self, data: bytes, sha256_hex: str, ext: str) -> str:
+        """Store `data` under its hash (no-op if already present) and return the key."""
+        key = f"{sha256_hex}.{ext}"
+        path = self.path_for(key)
+        if path.is_file():
+            return key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return key
+
+    async def put_async(self, data: bytes, sha256_hex: str, ext: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(None, self.put, data, sha256_hex, ext)
+
+
+blob_store = BlobStore(settings.BLOB_STORE_DIR)
+
+
+# ── Migration: base64 data URLs → blob store ──────────────────────────────────
+DATA_URL_PATTERN = re.compile(r"^data:(?P<mime>[\w/+.-]+);base64,(?P<payload>.*)$", re.S)
+
+
+def store_data_url(data_url: str) -> Optional[str]:
+    """Write the image inside a `data:` URL to the blob store and return its short URL."""
+    match = DATA_URL_PATTERN.match(data_url)
+    if not match:
+        return None
+    data = base64.b64decode(match["payload"])
+    key = blob_store.put(data, hashlib.sha256(data).hexdigest(), extension_for(match["mime"]))
+    return blob_url(key)
+
+
+async def migrate_data_urls(db, batch_size: int = 200) -> dict:
+    """Rewrite `data:` image URLs in detection history and the analysis cache."""
+    counts = {"disease_detections": 0, "disease_analysis_cache": 0, "skipped": 0}
+    targets = [("disease_detections", "imageUrl"), ("disease_analysis_cache", "result.imageUrl")]
+    for collection, field in targets:
+        cursor = db[collection].find({field: {"$regex": "^data:"}}, {field: 1}, batch_size=batch_size)
+        async for doc in cursor:
+            value = doc
+            for part in field.split("."):
+                value = value.get(part, {})
+            url = store_data_url(value) if isinstance(value, str) else None
+            if url is None:
+                counts["skipped"] += 1
+                continue
+            await db[collection].update_one({"_id": doc["_id"]}, {"$set": {field: url}})
+            counts[collection] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["migrate"]:
+        print("usage: python -m app.services.blob_store migrate")
+        sys.exit(1)
+
+    async def _main():
+        from app.database import connect_to_mongo, close_mongo_connection, db
+        await connect_to_mongo()
+        try:
+            counts = await migrate_data_urls(db.db)
+        finally:
+            await close_mongo_connection()
+        print(f"Migrated {counts} → {settings.BLOB_STORE_DIR}")
+
+    asyncio.run(_main())
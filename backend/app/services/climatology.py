@@ -0,0 +1,140 @@
+"""
+Gridded Monthly Climatology Store
+----------------------------------
+Monthly normals (temperature °C, rainfall mm, relative humidity %) on a
+0.25° grid covering India, kept in a single memory-mapped NumPy file:
+
+    shape (N_LAT, N_LON, 12, 3)  float32  ≈ 2.2 MB
+
+Lookups are O(1) array indexing with no network access.  The file is built
+offline from a local dataset of monthly normals:
+
+    python -m app.services.climatology normals.csv data/climatology.npy
+
+where the CSV has columns: lat, lon, month, temperature, rainfall, humidity.
+Cells without source data get the national seasonal profile below.
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+# ── Grid definition ───────────────────────────────────────────────────────────
+GRID_RES = 0.25
+LAT_MIN, LAT_MAX = 6.0, 38.0
+LON_MIN, LON_MAX = 68.0, 98.0
+N_LAT = int(round((LAT_MAX - LAT_MIN) / GRID_RES))   # 128
+N_LON = int(round((LON_MAX - LON_MIN) / GRID_RES))   # 120
+
+TEMP, RAIN, HUM = 0, 1, 2
+
+# National seasonal profile (Jan–Dec) used where no gridded data exists
+NATIONAL_MONTHLY = np.array([
+    [22, 24, 28, 34, 38, 35, 31, 30, 30, 28, 24, 21],     # temperature °C
+    [2, 3, 5, 8, 15, 50, 120, 110, 80, 25, 8, 3],         # rainfall mm
+    [55, 50, 45, 40, 45, 70, 80, 82, 78, 65, 55, 55],     # humidity %
+], dtype=np.float32).T                                     # → (12, 3)
+
+
+def cell_index(lat: float, lon: float) -> Tuple[int, int]:
+    """Map a coordinate to its (row, col) grid cell, clamped to the India box."""
+    i = int((lat - LAT_MIN) // GRID_RES)
+    j = int((lon - LON_MIN) // GRID_RES)
+    return min(max(i, 0), N_LAT - 1), min(max(j, 0), N_LON - 1)
+
+
+def cell_center(i: int, j: int) -> Tuple[float, float]:
+    """Centre coordinate of grid cell (row, col)."""
+    return LAT_MIN + (i + 0.5) * GRID_RES, LON_MIN + (j + 0.5) * GRID_RES
+
+
+class ClimatologyStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._grid: Optional[np.ndarray] = None
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        if self.path.exists():
+            grid = np.load(self.path, mmap_mode="r")
+            if grid.shape == (N_LAT, N_LON, 12, 3):
+                self._grid = grid
+
+    @property
+    def grid(self) -> Optional[np.ndarray]:
+        if not self._loaded:
+            self._load()
+        return self._grid
+
+    @property
+    def available(self) -> bool:
+        return self.grid is not None
+
+    def monthly(self, lat: float, lon: float, month: int) -> np.ndarray:
+        """[temperature, rainfall, humidity] normals for one month (1–12)."""
+        if self.grid is None:
+            return NATIONAL_MONTHLY[month - 1]
+        i, j = cell_index(lat, lon)
+        return self.grid[i, j, month - 1]
+
+    def seasonal_rainfall(self, lat: float, lon: float, start_month: int, months: int = 6) -> float:
+        """Total normal rainfall (mm) over `months` months starting at `start_month`."""
+        idx = (np.arange(months) + start_month - 1) % 12
+        if self.grid is None:
+            return float(NATIONAL_MONTHLY[idx, RAIN].sum())
+        i, j = cell_index(lat, lon)
+        return float(self.grid[i, j, idx, RAIN].sum())
+
+
+climatology = ClimatologyStore(settings.CLIMATOLOGY_PATH)
+
+
+def seasonal_rainfall_estimate(lat: float, lon: float) -> float:
+    """
+    Normal rainfall (mm) over the 6-month season starting this month — the
+    single definition of `rainfall_forecast` used by every weather provider
+    (national profile where no gridded data exists).
+    """
+    return round(climatology.seasonal_rainfall(lat, lon, datetime.utcnow().month), 1)
+
+
+# ── Offline builder ───────────────────────────────────────────────────────────
+def build_climatology(source_csv: str, out_path: str) -> np.ndarray:
+    """Bin point/grid monthly normals from a CSV into the 0.25° store and save it."""
+    import pandas as pd
+
+    df = pd.read_csv(source_csv, usecols=["lat", "lon", "month", "temperature", "rainfall", "humidity"])
+    df = df[df["lat"].between(LAT_MIN, LAT_MAX, inclusive="left")
+            & df["lon"].between(LON_MIN, LON_MAX, inclusive="left")
+            & df["month"].between(1, 12)]
+
+    i = ((df["lat"].to_numpy() - LAT_MIN) // GRID_RES).astype(np.intp)
+    j = ((df["lon"].to_numpy() - LON_MIN) // GRID_RES).astype(np.intp)
+    m = df["month"].to_numpy().astype(np.intp) - 1
+    values = df[["temperature", "rainfall", "humidity"]].to_numpy(dtype=np.float64)
+
+    sums = np.zeros((N_LAT, N_LON, 12, 3), dtype=np.float64)
+    counts = np.zeros((N_LAT, N_LON, 12, 1), dtype=np.float64)
+    np.add.at(sums, (i, j, m), values)
+    np.add.at(counts, (i, j, m), 1.0)
+
+    grid = np.where(counts > 0, sums / np.maximum(counts, 1), NATIONAL_MONTHLY[None, None])
+    grid = grid.astype(np.float32)
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    np.save(out_path, grid)
+    return grid
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python -m app.services.climatology <normals.csv> [out.npy]")
+        sys.exit(1)
+    out = sys.argv[2] if len(sys.argv) > 2 else settings.CLIMATOLOGY_PATH
+    built = build_climatology(sys.argv[1], out)
+    print(f"Wrote {out}: {built.shape} float32, {built.nbytes / 1e6:.1f} MB")
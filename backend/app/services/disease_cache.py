@@ -0,0 +1,85 @@
+"""
+Content-Addressed Disease-Analysis Cache
+-----------------------------------------
+Re-uploads of the same photo (repeat scans, WhatsApp forwards) are byte
+identical, so the analysis and stored image URL are keyed by the image's
+SHA-256 (qualified by the analyser and crop hint, see `cache_key`) and
+reused instead of re-uploading and re-running Plant.id.
+
+Two tiers:
+    memory  — per-process LRU, no I/O
+    mongo   — `disease_analysis_cache` collection, expired by a TTL index
+
+`stats()` reports hits per tier so the hit rate can be watched.
+"""
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+from app.repositories.disease_cache_repository import DiseaseCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+class DiseaseAnalysisCache:
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.stats_counters = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def _remember(self, key: str, result: dict):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, db, key: str) -> Optional[dict]:
+        """Cached analysis (including imageUrl) for this key, or None on a miss."""
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.stats_counters["memory_hits"] += 1
+            return dict(result)
+
+        if db is not None:
+            try:
+                result = await DiseaseCacheRepository(db).get(key)
+            except Exception as exc:  # cache must never block a scan
+                logger.warning("Disease cache lookup failed: %s", exc)
+                self.stats_counters["errors"] += 1
+                result = None
+            if result is not None:
+                self._remember(key, result)
+                self.stats_counters["mongo_hits"] += 1
+                return dict(result)
+
+        self.stats_counters["misses"] += 1
+        return None
+
+    async def put(self, db, key: str, result: dict):
+        # The scan time belongs to each request, not to the cached analysis
+        entry = {k: v for k, v in result.items() if k != "timestamp"}
+        self._remember(key, entry)
+        self.stats_counters["stores"] += 1
+        if db is None:
+            return
+        try:
+            await DiseaseCacheRepository(db).put(key, entry)
+        except Exception as exc:
+            logger.warning("Disease cache write failed: %s", exc)
+            self.stats_counters["errors"] += 1
+
+    def stats(self) -> dict:
+        counters = self.stats_counters
+        hits = counters["memory_hits"] + counters["mongo_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "memory_entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": settings.DISEASE_CACHE_TTL_SECONDS,
+        }
+
+
+disease_cache = DiseaseAnalysisCache()
@@ -0,0 +1,283 @@
+"""
+Local CPU Disease Classifier
+-----------------------------
+A small linear model over compact image features, so a scan needs neither a
+GPU nor the remote Plant.id call:
+
+    features   48 floats — hue (weighted by saturation), saturation and value
+               histograms of a 64 px thumbnail; without Pillow, a 48-bin
+               histogram of the raw file bytes
+    model      logits = W · features + b, one row per DISEASE_LIBRARY entry,
+               loaded from DISEASE_MODEL_PATH (.npz with W, b, labels) or
+               seeded colour prototypes when no trained model is present
+
+The prototypes only keep the pipeline runnable; their diagnoses are not
+meaningful, so DISEASE_BACKEND=auto uses the mock library until a model is
+trained from labelled leaf photos:
+
+    python -m app.services.disease_classifier labels          # folder names
+    python -m app.services.disease_classifier train photos/   # photos/<label>/*.jpg
+
+Only diseases of the hinted crop (plus the crop-agnostic entries) compete;
+a hint matches a crop, or a whole word of a disease name.
+
+`MicroBatcher` groups concurrent requests: the first request opens a batch
+that is flushed when it reaches `max_batch` items or `max_wait` seconds,
+and the whole batch runs as one matrix product in a worker thread.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ── Optional Pillow import ───────────────────────────────────────────────────
+try:
+    from PIL import Image
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+HUE_BINS, SAT_BINS, VAL_BINS = 24, 12, 12
+FEATURE_DIM = HUE_BINS + SAT_BINS + VAL_BINS
+FEATURE_SIZE = 64
+CROP_AGNOSTIC = {"all", "general"}
+PROTOTYPE_SEED = 7
+PROTOTYPE_SCALE = 12.0      # logit sharpness of the untrained prototype model
+PROTOTYPE_SOURCE = "prototypes"
+WORD = re.compile(r"[a-z0-9]+")
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def extract_features(data: bytes) -> np.ndarray:
+    """Normalised colour histograms of the image (byte histogram if it cannot be decoded)."""
+    if _PIL_AVAILABLE:
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img.draft("RGB", (FEATURE_SIZE, FEATURE_SIZE))
+                hsv = np.asarray(img.convert("RGB").resize((FEATURE_SIZE, FEATURE_SIZE)).convert("HSV"))
+            h, s, v = (hsv[..., k].ravel().astype(np.float32) / 256.0 for k in range(3))
+            hue = np.histogram(h, bins=HUE_BINS, range=(0, 1), weights=s)[0]
+            sat = np.histogram(s, bins=SAT_BINS, range=(0, 1))[0]
+            val = np.histogram(v, bins=VAL_BINS, range=(0, 1))[0]
+            return _normalise(hue, sat, val)
+        except Exception:
+            pass
+    raw = np.frombuffer(data, dtype=np.uint8)
+    counts = np.bincount((raw.astype(np.uint16) * FEATURE_DIM) >> 8, minlength=FEATURE_DIM)
+    return _normalise(counts)
+
+
+def _normalise(*parts) -> np.ndarray:
+    out = []
+    for part in parts:
+        part = np.asarray(part, dtype=np.float32)
+        out.append(part / max(float(part.sum()), 1e-6))
+    return np.concatenate(out)
+
+
+class LinearDiseaseModel:
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, source: str):
+        self.weights = weights.astype(np.float32)       # (classes, FEATURE_DIM)
+        self.bias = bias.astype(np.float32)             # (classes,)
+        self.source = source
+        # Content fingerprint, so a retrained file at the same path counts as a new model
+        digest = hashlib.sha256(self.weights.tobytes() + self.bias.tobytes()).hexdigest()[:12]
+        self.version = PROTOTYPE_SOURCE if source == PROTOTYPE_SOURCE else digest
+
+    @classmethod
+    def load(cls, path: str, labels: Sequence[str]) -> "LinearDiseaseModel":
+        """Trained model if `path` exists and matches the library, else seeded prototypes."""
+        if path and Path(path).is_file():
+            try:
+                npz = np.load(path)
+                row = {str(name): k for k, name in enumerate(npz["labels"])}
+                if npz["W"].shape[1] == FEATURE_DIM and all(name in row for name in labels):
+                    order = [row[name] for name in labels]
+                    return cls(npz["W"][order], npz["b"][order], source=path)
+                logger.warning("Disease model %s does not match the disease library; using prototypes", path)
+            except Exception as exc:
+                logger.warning("Could not load disease model %s: %s", path, exc)
+
+        rng = np.random.default_rng(PROTOTYPE_SEED)
+        prototypes = rng.dirichlet(np.ones(FEATURE_DIM), size=len(labels)).astype(np.float32)
+        prototypes /= np.linalg.norm(prototypes, axis=1, keepdims=True)
+        return cls(prototypes * PROTOTYPE_SCALE, np.zeros(len(labels)), source=PROTOTYPE_SOURCE)
+
+    def predict(self, features: np.ndarray, masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(best class, probability) per row, softmax over each row's allowed classes."""
+        logits = features @ self.weights.T + self.bias             # (batch, classes)
+        logits = np.where(masks, logits, -np.inf)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return best, probs[np.arange(len(best)), best]
+
+
+class MicroBatcher:
+    """Collects concurrent submissions and runs them as one batch in a worker thread."""
+
+    def __init__(self, fn: Callable[[List], List], max_batch: int = 32, max_wait: float = 0.005):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: list = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set = set()          # strong refs so in-flight batches are not collected
+        self.stats = {"batches": 0, "items": 0, "largest_batch": 0}
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list):
+        self.stats["batches"] += 1
+        self.stats["items"] += len(batch)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(None, self.fn, [item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class DiseaseClassifier:
+    """Crop-restricted classification over `library` entries with micro-batched inference."""
+
+    def __init__(self, library: List[dict], model_path: str = "", max_batch: int = 32, max_wait: float = 0.005):
+        self.library = library
+        self.labels = [entry["diseaseName"] for entry in library]
+        self._crops = [entry["crop"] for entry in library]
+        self._name_words = [set(WORD.findall(name.lower())) for name in self.labels]
+        self.model_path = model_path
+        self._model: Optional[LinearDiseaseModel] = None
+        self.batcher = MicroBatcher(self._predict_batch, max_batch=max_batch, max_wait=max_wait)
+
+    @property
+    def model(self) -> LinearDiseaseModel:
+        if self._model is None:
+            self._model = LinearDiseaseModel.load(self.model_path, self.labels)
+        return self._model
+
+    @property
+    def trained(self) -> bool:
+        return self.model.source != PROTOTYPE_SOURCE
+
+    def candidate_mask(self, crop_hint: Optional[str]) -> np.ndarray:
+        """Entries for the hinted crop plus crop-agnostic ones; every entry without a usable hint."""
+        hint = (crop_hint or "").strip().lower()
+        hint_words = set(WORD.findall(hint))
+        mask = np.array([
+            crop == hint or crop in CROP_AGNOSTIC or hint_words <= words
+            for crop, words in zip(self._crops, self._name_words)
+        ]) if hint_words else np.ones(len(self.labels), dtype=bool)
+        # A hint matching no crop-specific entry is ignored rather than forcing "healthy"
+        specific = mask & ~np.isin(self._crops, list(CROP_AGNOSTIC))
+        return mask if specific.any() else np.ones(len(self.labels), dtype=bool)
+
+    def _predict_batch(self, items: List[Tuple[bytes, np.ndarray]]) -> List[Tuple[int, float]]:
+        features = np.stack([extract_features(data) for data, _ in items])
+        masks = np.stack([mask for _, mask in items])
+        best, prob = self.model.predict(features, masks)
+        return list(zip(best.tolist(), prob.tolist()))
+
+    async def classify(self, data: bytes, crop_hint: Optional[str] = None) -> Tuple[dict, float]:
+        """(library entry, confidence 0–100) for one image."""
+        index, prob = await self.batcher.submit((data, self.candidate_mask(crop_hint)))
+        return self.library[index], round(prob * 100, 1)
+
+
+# ── Training ──────────────────────────────────────────────────────────────────
+def label_slug(name: str) -> str:
+    """Folder name for a disease's training photos."""
+    return "-".join(WORD.findall(name.lower()))
+
+
+def train(labels: Sequence[str], image_dir: str, out_path: str,
+          epochs: int = 500, learning_rate: float = 0.5, l2: float = 1e-3) -> Dict[str, int]:
+    """
+    Fit W, b by softmax regression on `image_dir/<label_slug>/*` and save them
+    as the .npz `LinearDiseaseModel.load` reads.  Labels without photos get a
+    very low bias so they are never predicted.  Returns photos per label.
+    """
+    root = Path(image_dir)
+    features, targets, counts = [], [], {}
+    for k, name in enumerate(labels):
+        folder = root / label_slug(name)
+        paths = sorted(p for p in folder.glob("*") if p.suffix.lower() in IMAGE_SUFFIXES) if folder.is_dir() else []
+        counts[name] = len(paths)
+        for path in paths:
+            features.append(extract_features(path.read_bytes()))
+            targets.append(k)
+    if not features:
+        raise ValueError(f"No training photos found under {root}")
+
+    x, y = np.stack(features), np.asarray(targets)
+    onehot = np.eye(len(labels), dtype=np.float32)[y]
+    weights = np.zeros((len(labels), FEATURE_DIM), dtype=np.float32)
+    bias = np.zeros(len(labels), dtype=np.float32)
+    for _ in range(epochs):
+        logits = x @ weights.T + bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        grad = (probs - onehot) / len(x)
+        weights -= learning_rate * (grad.T @ x + l2 * weights)
+        bias -= learning_rate * grad.sum(axis=0)
+    bias[[counts[name] == 0 for name in labels]] = -1e3
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez(out_path, W=weights, b=bias, labels=np.asarray(labels))
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.config import settings
+    from app.services.disease_service import DISEASE_LIBRARY
+
+    parser = argparse.ArgumentParser(description="Local disease classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("labels", help="print the training folder name for each disease")
+    fit = sub.add_parser("train", help="fit the linear model from labelled photos")
+    fit.add_argument("image_dir")
+    fit.add_argument("--out", default=settings.DISEASE_MODEL_PATH)
+    args = parser.parse_args()
+
+    library_labels = [entry["diseaseName"] for entry in DISEASE_LIBRARY]
+    if args.command == "labels":
+        for label in library_labels:
+            print(f"{label_slug(label):70s} {label}")
+    else:
+        photo_counts = train(library_labels, args.image_dir, args.out)
+        print(f"Trained on {sum(photo_counts.values())} photos "
+              f"({sum(1 for c in photo_counts.values() if c)} / {len(library_labels)} diseases) → {args.out}")
@@ -0,0 +1,201 @@
+"""
+Asynchronous Disease-Analysis Jobs
+-----------------------------------
+`POST /disease/detect?async=true` stores the image in the blob store, records
+a job in the `disease_jobs` collection and returns its id at once, so slow
+remote analysis (Plant.id, up to 30 s) never holds the HTTP request open.
+
+    queued → running → done | failed
+
+A fixed pool of worker tasks drains a bounded in-memory queue.  When the
+queue is full `submit` raises `QueueFullError` (the route answers 503 with
+Retry-After) instead of accepting work it cannot start soon.  Failed
+attempts are retried with exponential backoff.  Jobs live in MongoDB, so
+anything queued or running when the process stopped is re-queued on
+startup; job documents expire DISEASE_JOB_TTL_SECONDS after creation.
+Clients poll `GET /disease/jobs/{id}` or subscribe to its SSE stream;
+subscribers are notified on every status change.  tests/test_disease_jobs.py
+drives the queue against the local Plant.id stub.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from app.config import settings
+from app.repositories.disease_job_repository import DiseaseJobRepository
+from app.services import blob_store, disease_service
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 2.0
+TERMINAL = {"done", "failed"}
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def public_job(job: dict, request_base: str = "") -> dict:
+    """Client view of a job document, with absolute image URLs in its result."""
+    result = job.get("result")
+    return {
+        "jobId": job["_id"],
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "result": blob_store.absolute_urls(result, request_base) if result else None,
+        "error": job.get("error"),
+        "createdAt": job["created_at"].isoformat(),
+        "updatedAt": job["updated_at"].isoformat(),
+    }
+
+
+class DiseaseJobQueue:
+    def __init__(self, workers: int, max_queued: int):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: Optional[asyncio.Queue] = None
+        self._reserved = 0
+        self._tasks: list = []
+        self._retry_timers: set = set()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._db = None
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "retries": 0, "rejected": 0}
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    async def start(self, db):
+        self._db = db
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        pending = await DiseaseJobRepository(db).requeue_unfinished()
+        if pending:
+            logger.info("Re-queuing %d unfinished disease jobs", len(pending))
+            # Blocking puts let a backlog larger than the queue drain gradually
+            self._tasks.append(asyncio.create_task(self._enqueue_all(pending)))
+
+    async def stop(self):
+        tasks = self._tasks + list(self._retry_timers)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _enqueue_all(self, job_ids):
+        for job_id in job_ids:
+            await self._queue.put(job_id)
+
+    # ── Producer side ─────────────────────────────────────────────────────────
+    async def submit(self, image: disease_service.LeafImage, crop_hint: Optional[str], user_email: str) -> str:
+        if self._queue is None:
+            raise QueueFullError("Job queue is not running.")
+        # Reserve the slot before awaiting, so concurrent submits cannot overfill the queue
+        if self._queue.qsize() + self._reserved >= self.max_queued:
+            self.stats["rejected"] += 1
+            raise QueueFullError("Too many analyses in progress.")
+        self._reserved += 1
+        try:
+            ext = blob_store.extension_for(image.content_type, image.filename)
+            key = await blob_store.blob_store.put_async(image.data, image.sha256, ext)
+            job_id = await DiseaseJobRepository(self._db).create_job({
+                "user_email": user_email,
+                "status": "queued",
+                "attempts": 0,
+                "blob_key": key,
+                "filename": image.filename,
+                "content_type": image.content_type,
+                "crop_hint": crop_hint,
+            })
+        finally:
+            self._reserved -= 1
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            # Retries and the startup backlog use blocking puts and can still take the slot
+            self.stats["rejected"] += 1
+            await self._update(job_id, {"status": "failed", "error": "Job queue is full.", "finished_at": datetime.utcnow()})
+            raise QueueFullError("Too many analyses in progress.")
+        self.stats["submitted"] += 1
+        return job_id
+
+    def retry_after_seconds(self) -> int:
+        """Rough time for the queue to drain by one worker's worth of jobs."""
+        return max(1, int(RETRY_BASE_SECONDS * self._queue.qsize() / max(self.workers, 1))) if self._queue else 5
+
+    # ── Subscriptions (SSE) ───────────────────────────────────────────────────
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Queue that receives the job document after every status change."""
+        events: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(events)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    async def _update(self, job_id: str, fields: dict):
+        repo = DiseaseJobRepository(self._db)
+        await repo.update_job(job_id, fields)
+        subscribers = self._subscribers.get(job_id)
+        if subscribers:
+            job = await repo.get_job(job_id)
+            for events in list(subscribers):
+                events.put_nowait(job)
+
+    # ── Worker side ───────────────────────────────────────────────────────────
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # never let one job kill the worker
+                logger.exception("Disease job %s crashed: %s", job_id, exc)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await DiseaseJobRepository(self._db).get_job(job_id)
+        if job is None or job["status"] in TERMINAL:
+            return
+        attempts = job.get("attempts", 0) + 1
+        await self._update(job_id, {"status": "running", "attempts": attempts})
+
+        try:
+            path = blob_store.blob_store.find(job["blob_key"])
+            if path is None:
+                raise FileNotFoundError(f"Stored image {job['blob_key']} is missing.")
+            data = await asyncio.get_running_loop().run_in_executor(None, path.read_bytes)
+            image = disease_service.LeafImage.from_bytes(data, job.get("filename") or "leaf.jpg", job.get("content_type"))
+            result = await disease_service.analyze_cached(image, job.get("crop_hint"), self._db)
+        except Exception as exc:
+            if attempts < MAX_ATTEMPTS and not isinstance(exc, FileNotFoundError):
+                self.stats["retries"] += 1
+                await self._update(job_id, {"status": "queued", "error": str(exc)})
+                timer = asyncio.create_task(self._requeue_later(job_id, RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+                self._retry_timers.add(timer)
+                timer.add_done_callback(self._retry_timers.discard)
+            else:
+                self.stats["failed"] += 1
+                await self._update(job_id, {"status": "failed", "error": str(exc), "finished_at": datetime.utcnow()})
+            return
+
+        try:
+            await self._db["disease_detections"].insert_one(
+                disease_service.history_doc(job["user_email"], result, job.get("crop_hint"))
+            )
+        except Exception:
+            pass  # History write failure must not fail the job
+        self.stats["completed"] += 1
+        await self._update(job_id, {"status": "done", "result": result, "error": None, "finished_at": datetime.utcnow()})
+
+    async def _requeue_later(self, job_id: str, delay: float):
+        await asyncio.sleep(delay)
+        await self._queue.put(job_id)
+
+
+disease_jobs = DiseaseJobQueue(settings.DISEASE_JOB_WORKERS, settings.DISEASE_JOB_QUEUE_SIZE)
@@ -1,19 +1,34 @@
 """
 Disease Detection Service
 --------------------------
-1. Uploads the image to Cloudinary (falls back to base64 if no credentials).
+0. Streams the upload in chunks, rejecting it as soon as it exceeds the size
+   limit and computing every digest it needs in that single pass.
+1. Uploads the image to Cloudinary (falls back to the local blob store if no
+   credentials).
+   The Cloudinary SDK is synchronous, so uploads run on a bounded thread pool
+   and never block the event loop.
 2. Runs the disease analysis — calls Plant.id API if PLANT_ID_API_KEY is set,
-   otherwise returns a richly-seeded mock response from the DISEASE_LIBRARY.
+   otherwise classifies locally on the CPU (see disease_classifier.py),
+   restricted to the hinted crop's diseases, once a trained model exists —
+   until then the hash-seeded pick from the DISEASE_LIBRARY is used.
+   DISEASE_BACKEND overrides the choice ("local" forces the classifier).
+   Local analysis does not need the uploaded URL, so it overlaps the upload.
 """
-import base64
+import asyncio
 import hashlib
 import os
 import io
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from typing import Optional
 
 import httpx
+import numpy as np
 from app.config import settings
+from app.services import blob_store, thumbnails
+from app.services.disease_cache import disease_cache
+from app.services.disease_classifier import DiseaseClassifier
 
 # ── Optional Cloudinary import ───────────────────────────────────────────────
 try:
@@ -379,6 +394,77 @@ DISEASE_LIBRARY = [
 
 
 
+local_classifier = DiseaseClassifier(DISEASE_LIBRARY, settings.DISEASE_MODEL_PATH)
+
+
+# ── Streaming upload reader ──────────────────────────────────────────────────
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+class LeafImage:
+    """
+    An uploaded image read exactly once.  `data` is immutable bytes, so
+    `memoryview(data)` and `io.BytesIO(data)` share it without copying.
+    """
+    __slots__ = ("data", "sha256", "md5", "filename", "content_type")
+
+    def __init__(self, data: bytes, sha256: str, md5: str, filename: str, content_type: Optional[str]):
+        self.data = data
+        self.sha256 = sha256
+        self.md5 = md5
+        self.filename = filename
+        self.content_type = content_type
+
+    @classmethod
+    def from_bytes(cls, data: bytes, filename: str = "leaf.jpg", content_type: Optional[str] = None) -> "LeafImage":
+        """Wrap bytes that are already in memory (e.g. reloaded from the blob store)."""
+        return cls(data, hashlib.sha256(data).hexdigest(), hashlib.md5(data).hexdigest(), filename, content_type)
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def view(self) -> memoryview:
+        return memoryview(self.data)
+
+
+async def read_upload(upload, max_size: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> LeafImage:
+    """
+    Read an UploadFile in chunks, hashing as it goes.  Raises ImageTooLargeError
+    once more than `max_size` bytes have arrived (or immediately if the declared
+    size is already too large) instead of buffering the whole body first.
+    """
+    declared = getattr(upload, "size", None)
+    if declared is not None and declared > max_size:
+        raise ImageTooLargeError(f"Upload is {declared} bytes; limit is {max_size}.")
+
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    chunks, total = [], 0
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_size:
+            raise ImageTooLargeError(f"Upload exceeds {max_size} bytes.")
+        sha256.update(chunk)
+        md5.update(chunk)
+        chunks.append(chunk)
+
+    return LeafImage(
+        data=b"".join(chunks),
+        sha256=sha256.hexdigest(),
+        md5=md5.hexdigest(),
+        filename=upload.filename or "leaf.jpg",
+        content_type=getattr(upload, "content_type", None),
+    )
+
+
 # ── Cloudinary setup ──────────────────────────────────────────────────────────
 def _configure_cloudinary():
     """Configure Cloudinary only if all credentials are present."""
@@ -396,58 +482,160 @@ def _configure_cloudinary():
     return False
 
 
-async def upload_image(file_bytes: bytes, filename: str) -> str:
+# Blocking SDK uploads are confined to a few threads; the semaphore keeps
+# excess uploads waiting on the event loop instead of piling into the pool.
+UPLOAD_WORKERS = 4
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="cloudinary-upload")
+_upload_slots = asyncio.Semaphore(UPLOAD_WORKERS * 2)
+
+
+async def upload_image(image: LeafImage) -> str:
     """
     Upload image to Cloudinary under the 'cropsense/disease' folder.
-    Falls back to a base64 data-URL if Cloudinary is not configured.
+    Falls back to the local blob store if Cloudinary is not configured.
     """
     if _configure_cloudinary():
-        # Cloudinary upload (sync SDK wrapped in thread pool via httpx)
-        result = cloudinary.uploader.upload(
-            io.BytesIO(file_bytes),
+        upload = partial(
+            cloudinary.uploader.upload,
+            io.BytesIO(image.data),
             folder="cropsense/disease",
-            public_id=f"disease_{hashlib.md5(file_bytes).hexdigest()[:8]}",
+            public_id=f"disease_{image.md5[:8]}",
             resource_type="image",
         )
+        async with _upload_slots:
+            result = await asyncio.get_running_loop().run_in_executor(_upload_executor, upload)
         return result["secure_url"]
 
-    # Fallback: inline base64 data-URL (no external service required)
-    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else "jpeg"
-    mime = f"image/{ext}"
-    b64 = base64.b64encode(file_bytes).decode()
-    return f"data:{mime};base64,{b64}"
+    # Fallback: local content-addressed blob store (no external service required)
+    ext = blob_store.extension_for(image.content_type, image.filename)
+    key = await blob_store.blob_store.put_async(image.data, image.sha256, ext)
+    return blob_store.blob_url(key)
 
 
-def _pick_disease(file_bytes: bytes) -> dict:
+def _pick_disease(sha256_hex: str, crop_hint: Optional[str] = None) -> dict:
     """
     Deterministically pick a disease entry based on the image content hash
-    so that the same image always produces the same mock result.
+    so that the same image always produces the same mock result.  The pick is
+    limited to the hinted crop's entries, as the classifier's is.
     """
-    digest = hashlib.sha256(file_bytes).hexdigest()
-    idx = int(digest[:8], 16) % len(DISEASE_LIBRARY)
+    candidates = np.flatnonzero(local_classifier.candidate_mask(crop_hint))
+    idx = candidates[int(sha256_hex[:8], 16) % len(candidates)]
     return DISEASE_LIBRARY[idx]
 
 
-async def analyze_disease(file_bytes: bytes, image_url: str, crop_hint: Optional[str] = None) -> dict:
+def cache_key(image: LeafImage, crop_hint: Optional[str] = None) -> str:
+    """
+    Analysis-cache key: the analyser that would answer now, the image hash and
+    the crop hint that narrows the result.  Enabling Plant.id or training a
+    model therefore stops earlier mock or prototype diagnoses being replayed.
+    """
+    hint = (crop_hint or "").strip().lower()
+    key = f"{_analysis_backend()}:{image.sha256}"
+    return f"{key}:{hint}" if hint else key
+
+
+def _plant_id_enabled() -> bool:
+    return settings.DISEASE_BACKEND in ("auto", "plant_id") and bool(getattr(settings, "PLANT_ID_API_KEY", ""))
+
+
+def _use_mock() -> bool:
+    # Untrained prototype weights give arbitrary diagnoses; "auto" keeps the mock until a model exists
+    return settings.DISEASE_BACKEND == "mock" or (settings.DISEASE_BACKEND == "auto" and not local_classifier.trained)
+
+
+def _analysis_backend() -> str:
+    """"plantid", "mock" or "model-<version>", mirroring the choice `upload_and_analyze` makes."""
+    if _plant_id_enabled() and (_configure_cloudinary() or settings.PUBLIC_BASE_URL):
+        return "plantid"
+    if _use_mock():
+        return "mock"
+    return f"model-{local_classifier.model.version}"
+
+
+async def analyze_disease(image: LeafImage, image_url: str, crop_hint: Optional[str] = None) -> dict:
     """
     Analyse the crop image for disease.
 
-    If PLANT_ID_API_KEY is set in settings, calls the Plant.id v3 health
-    assessment API.  Otherwise falls back to the deterministic mock library.
+    If PLANT_ID_API_KEY is set in settings (and the image has a public URL),
+    calls the Plant.id v3 health assessment API.  Otherwise runs the local
+    classifier, or the deterministic mock library when DISEASE_BACKEND=mock
+    or no trained model is available.
     """
-    plant_id_key = getattr(settings, "PLANT_ID_API_KEY", "")
+    if _plant_id_enabled() and image_url.startswith("http"):
+        return await _call_plant_id(image, image_url, settings.PLANT_ID_API_KEY, crop_hint)
+    return await _offline_analysis(image, image_url, crop_hint)
 
-    if plant_id_key and image_url.startswith("http"):
-        return await _call_plant_id(image_url, plant_id_key)
 
-    # ── Mock response ──────────────────────────────────────────────────────
-    disease = _pick_disease(file_bytes)
+async def _offline_analysis(image: LeafImage, image_url: str, crop_hint: Optional[str]) -> dict:
+    """Local classifier, or the mock library when configured or no trained model exists."""
+    if _use_mock():
+        return _mock_analysis(image, image_url, crop_hint)
+    return await _local_analysis(image, image_url, crop_hint)
+
+
+async def analyze_cached(image: LeafImage, crop_hint: Optional[str], db) -> dict:
+    """Stored analysis for identical bytes + hint, else upload, analyse and cache."""
+    key = cache_key(image, crop_hint)
+    result = await disease_cache.get(db, key)
+    if result is not None:
+        result["timestamp"] = datetime.utcnow().isoformat()
+        return result
+
+    result = await upload_and_analyze(image, crop_hint)
+    await disease_cache.put(db, key, result)
+    return result
 
-    # Pseudo-random confidence: 72–97 % based on file hash
-    hash_val = int(hashlib.md5(file_bytes).hexdigest()[:4], 16)
-    confidence = round(72 + (hash_val % 26) + (hash_val % 7) * 0.3, 1)
-    confidence = min(confidence, 97.8)
 
+def history_doc(user_email: str, result: dict, crop_hint: Optional[str]) -> dict:
+    """One `disease_detections` document per scan."""
+    return {
+        "user_email": user_email,
+        "diseaseName": result["diseaseName"],
+        "confidence": result["confidence"],
+        "severity": result["severity"],
+        "treatment": result["treatment"],
+        "pesticide": result["pesticide"],
+        "prevention": result["prevention"],
+        "imageUrl": result["imageUrl"],
+        "thumbnailUrl": result.get("thumbnailUrl"),
+        "crop_hint": crop_hint,
+        "timestamp": datetime.utcnow(),
+    }
+
+
+async def upload_and_analyze(image: LeafImage, crop_hint: Optional[str] = None) -> dict:
+    """
+    Upload the image, build its thumbnail and analyse it.  Plant.id fetches the
+    image by its public URL, so that path must wait for the upload; local
+    analysis runs alongside it.
+    """
+    use_cloudinary = _configure_cloudinary()
+    publicly_reachable = use_cloudinary or bool(settings.PUBLIC_BASE_URL)
+    if _plant_id_enabled() and publicly_reachable:
+        image_url, thumbnail_url = await asyncio.gather(
+            upload_image(image),
+            _local_thumbnail(image, use_cloudinary),
+        )
+        result = await analyze_disease(image, blob_store.absolute_url(image_url), crop_hint)
+    else:
+        image_url, thumbnail_url, result = await asyncio.gather(
+            upload_image(image),
+            _local_thumbnail(image, use_cloudinary),
+            analyze_disease(image, "", crop_hint),
+        )
+    result["imageUrl"] = image_url
+    result["thumbnailUrl"] = thumbnails.cloudinary_thumbnail_url(image_url) if use_cloudinary else thumbnail_url
+    return result
+
+
+async def _local_thumbnail(image: LeafImage, use_cloudinary: bool) -> Optional[str]:
+    """Cloudinary resizes on delivery; only locally stored images need a rendered thumbnail."""
+    if use_cloudinary:
+        return None
+    return await thumbnails.create_local_thumbnail(image.data, image.sha256)
+
+
+def _library_result(disease: dict, confidence: float, image_url: str) -> dict:
     return {
         "diseaseName": disease["diseaseName"],
         "confidence": confidence,
@@ -460,7 +648,25 @@ async def analyze_disease(file_bytes: bytes, image_url: str, crop_hint: Optional
     }
 
 
-async def _call_plant_id(image_url: str, api_key: str) -> dict:
+async def _local_analysis(image: LeafImage, image_url: str, crop_hint: Optional[str]) -> dict:
+    """Micro-batched CPU classification over the crop's candidate diseases."""
+    disease, confidence = await local_classifier.classify(image.data, crop_hint)
+    return _library_result(disease, confidence, image_url)
+
+
+def _mock_analysis(image: LeafImage, image_url: str, crop_hint: Optional[str] = None) -> dict:
+    """Deterministic mock response from the DISEASE_LIBRARY, keyed by the image digests."""
+    disease = _pick_disease(image.sha256, crop_hint)
+
+    # Pseudo-random confidence: 72–97 % based on file hash
+    hash_val = int(image.md5[:4], 16)
+    confidence = round(72 + (hash_val % 26) + (hash_val % 7) * 0.3, 1)
+    confidence = min(confidence, 97.8)
+
+    return _library_result(disease, confidence, image_url)
+
+
+async def _call_plant_id(image: LeafImage, image_url: str, api_key: str, crop_hint: Optional[str] = None) -> dict:
     """
     Call Plant.id v3 Health Assessment API.
     Docs: https://plant.id/docs#tag/Plant-Health-Assessment
@@ -472,7 +678,7 @@ async def _call_plant_id(image_url: str, api_key: str) -> dict:
     }
     async with httpx.AsyncClient(timeout=30) as client:
         resp = await client.post(
-            "https://api.plant.id/v3/health_assessment",
+            settings.PLANT_ID_API_URL,
             json=payload,
             headers={"Api-Key": api_key, "Content-Type": "application/json"},
         )
@@ -482,7 +688,7 @@ async def _call_plant_id(image_url: str, api_key: str) -> dict:
     # Map Plant.id response structure → CropSense schema
     diseases = data.get("result", {}).get("disease", {}).get("suggestions", [])
     if not diseases:
-        return await analyze_disease(b"", image_url)  # fall back to mock
+        return await _offline_analysis(image, image_url, crop_hint)  # no suggestions: offline analysis
 
     top = diseases[0]
     name = top.get("name", "Unknown Disease")
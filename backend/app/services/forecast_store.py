@@ -0,0 +1,111 @@
+"""
+Hourly Forecast Store
+----------------------
+Keeps extended-range (up to 16-day) hourly temperature and humidity per
+0.25° weather cell as one contiguous float32 array of shape (2, hours)
+instead of lists of per-hour dicts:
+
+    16 days × 24 h × 2 series × 4 bytes ≈ 3 KB per cell
+
+Consumers (spoilage, harvest timing) receive NumPy views — slicing never
+copies the underlying series.  `footprint()` reports the memory held
+(see benchmarks/hourly_store_memory.py).
+"""
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+SERIES_TEMP, SERIES_HUM = 0, 1
+HOUR = 3600
+
+
+class CellForecast:
+    """Hourly series for one cell, starting at `start` (unix seconds, UTC, hour-aligned)."""
+    __slots__ = ("start", "series", "source", "fetched_at", "ttl_seconds")
+
+    def __init__(self, start: int, series: np.ndarray, source: str, ttl_seconds: Optional[int] = None):
+        self.start = int(start)
+        self.series = series            # (2, hours) float32, read-only
+        self.source = source
+        self.fetched_at = time.time()
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def hours(self) -> int:
+        return self.series.shape[1]
+
+    @property
+    def end(self) -> int:
+        """Unix time just past the last hour covered."""
+        return self.start + self.hours * HOUR
+
+    @property
+    def nbytes(self) -> int:
+        return self.series.nbytes
+
+    def _bounds(self, offset: int, hours: Optional[int]) -> Tuple[int, int]:
+        lo = min(max(offset, 0), self.hours)
+        hi = self.hours if hours is None else min(lo + hours, self.hours)
+        return lo, hi
+
+    def temperature(self, offset: int = 0, hours: Optional[int] = None) -> np.ndarray:
+        lo, hi = self._bounds(offset, hours)
+        return self.series[SERIES_TEMP, lo:hi]
+
+    def humidity(self, offset: int = 0, hours: Optional[int] = None) -> np.ndarray:
+        lo, hi = self._bounds(offset, hours)
+        return self.series[SERIES_HUM, lo:hi]
+
+    def window(self, from_ts: float, hours: int) -> np.ndarray:
+        """(2, ≤hours) view starting at the hour containing `from_ts`."""
+        lo, hi = self._bounds(int((from_ts - self.start) // HOUR), hours)
+        return self.series[:, lo:hi]
+
+
+class HourlyForecastStore:
+    """Bounded LRU of CellForecast keyed by (row, col) grid cell."""
+
+    def __init__(self, ttl_seconds: int = 3 * HOUR, max_cells: int = 4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_cells = max_cells
+        self._cells: "OrderedDict[Tuple[int, int], CellForecast]" = OrderedDict()
+
+    def get(self, cell: Tuple[int, int]) -> Optional[CellForecast]:
+        entry = self._cells.get(cell)
+        if entry is None:
+            return None
+        ttl = self.ttl_seconds if entry.ttl_seconds is None else entry.ttl_seconds
+        if time.time() - entry.fetched_at > ttl:
+            del self._cells[cell]
+            return None
+        self._cells.move_to_end(cell)
+        return entry
+
+    def put(self, cell: Tuple[int, int], start: int, temps, hums, source: str,
+            ttl_seconds: Optional[int] = None) -> CellForecast:
+        """Store a series; `ttl_seconds` overrides the store TTL for this entry."""
+        series = np.empty((2, len(temps)), dtype=np.float32)
+        series[SERIES_TEMP] = temps
+        series[SERIES_HUM] = hums
+        series.flags.writeable = False
+        entry = CellForecast(start, series, source, ttl_seconds)
+        self._cells[cell] = entry
+        self._cells.move_to_end(cell)
+        while len(self._cells) > self.max_cells:
+            self._cells.popitem(last=False)
+        return entry
+
+    def footprint(self) -> dict:
+        """Total and per-cell array bytes currently held."""
+        total = sum(c.nbytes for c in self._cells.values())
+        count = len(self._cells)
+        return {
+            "cells": count,
+            "array_bytes": total,
+            "bytes_per_cell": round(total / count) if count else 0,
+        }
+
+
+hourly_store = HourlyForecastStore()
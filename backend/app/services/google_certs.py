@@ -0,0 +1,146 @@
+"""
+Google Sign-In Certificate Cache
+---------------------------------
+Google ID tokens are RS256 JWTs signed with keys published at
+GOOGLE_CERTS_URL.  Instead of fetching them on every /auth/google call,
+the certificates are kept in memory for the `max-age` Google sends in
+Cache-Control and refreshed by a background task shortly before they
+expire.  Verification is then pure in-process RSA with no network on the
+hot path.  An unknown `kid` (key rotation) forces one immediate refresh,
+at most once per FORCED_REFRESH_COOLDOWN seconds; tokens with an unknown
+`kid` inside the cooldown are rejected, so forged key ids cannot turn
+/auth/google into a stream of requests to Google.
+
+Point GOOGLE_CERTS_URL at `python -m app.services.google_certs_stub` to
+test sign-in without Google.
+"""
+import asyncio
+import base64
+import json
+import logging
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt as google_jwt
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = {"accounts.google.com", "https://accounts.google.com"}
+DEFAULT_MAX_AGE = 3600
+MIN_MAX_AGE = 60
+REFRESH_MARGIN = 0.1          # refresh when 10% of the lifetime is left
+RETRY_SECONDS = 30
+FORCED_REFRESH_COOLDOWN = 60
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def parse_max_age(cache_control: Optional[str]) -> int:
+    match = MAX_AGE_PATTERN.search(cache_control or "")
+    return max(MIN_MAX_AGE, int(match.group(1))) if match else DEFAULT_MAX_AGE
+
+
+def token_key_id(token: str) -> Optional[str]:
+    """`kid` from the (unverified) JWT header."""
+    try:
+        header = token.split(".", 1)[0]
+        return json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4))).get("kid")
+    except Exception as e:
+        raise ValueError(f"Malformed token: {e}")
+
+
+class GoogleCertCache:
+    def __init__(self, url: str):
+        self.url = url
+        self._certs: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._last_forced = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"refreshes": 0, "refresh_errors": 0, "forced_refreshes": 0}
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self._certs) and time.time() < self._expires_at
+
+    async def refresh(self):
+        """Fetch the current key set and honour its Cache-Control max-age."""
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.get(self.url)
+            resp.raise_for_status()
+            certs = resp.json()
+        if not isinstance(certs, dict) or not certs:
+            raise ValueError("Google certs response contained no keys")
+        self._certs = certs
+        self._fetched_at = time.time()
+        self._expires_at = self._fetched_at + parse_max_age(resp.headers.get("cache-control"))
+        self.stats["refreshes"] += 1
+
+    async def get_certs(self, force: bool = False) -> Dict[str, str]:
+        if self.fresh and not force:
+            return self._certs
+        async with self._lock:
+            # Another caller may have refreshed while this one waited
+            if force or not self.fresh:
+                await self.refresh()
+        return self._certs
+
+    async def _certs_with_key(self, kid: Optional[str]) -> Dict[str, str]:
+        """Key set containing `kid`, refreshing once if the cooldown allows it."""
+        async with self._lock:
+            # A concurrent caller may already have fetched the rotated keys
+            if kid not in self._certs and time.time() - self._last_forced >= FORCED_REFRESH_COOLDOWN:
+                self._last_forced = time.time()
+                self.stats["forced_refreshes"] += 1
+                await self.refresh()
+        if kid not in self._certs:
+            raise ValueError("Unknown key id")
+        return self._certs
+
+    async def verify(self, token: str, audience: str) -> dict:
+        """Verified ID-token claims; raises ValueError for any invalid token."""
+        certs = await self.get_certs()
+        kid = token_key_id(token)
+        if kid not in certs:
+            certs = await self._certs_with_key(kid)
+
+        try:
+            claims = google_jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=10)
+        except (ValueError, google_exceptions.GoogleAuthError) as e:
+            raise ValueError(str(e))
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+    # ── Background refresh ────────────────────────────────────────────────────
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.get_certs(force=True)
+                lifetime = self._expires_at - self._fetched_at
+                delay = max(MIN_MAX_AGE * REFRESH_MARGIN, lifetime * (1 - REFRESH_MARGIN))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats["refresh_errors"] += 1
+                logger.warning("Google certs refresh failed: %s", exc)
+                delay = RETRY_SECONDS
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+google_certs = GoogleCertCache(settings.GOOGLE_CERTS_URL)
@@ -0,0 +1,111 @@
+"""
+Local Google Key-Server Stub
+-----------------------------
+Serves a self-signed signing certificate in the same shape as Google's
+`oauth2/v1/certs` endpoint and mints ID tokens signed with it, so
+/auth/google can be exercised without network access:
+
+    python -m app.services.google_certs_stub serve --port 8766 --max-age 300
+    python -m app.services.google_certs_stub token farmer@example.com --aud <GOOGLE_CLIENT_ID>
+
+with the API started using
+GOOGLE_CERTS_URL=http://127.0.0.1:8766/oauth2/v1/certs.  The key pair is
+persisted in --key-file so tokens stay valid across restarts of the stub.
+"""
+import argparse
+import datetime
+import hashlib
+import time
+from pathlib import Path
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from fastapi import FastAPI, Response
+from google.auth import crypt
+from google.auth import jwt as google_jwt
+
+KEY_ID = "cropsense-stub-1"
+DEFAULT_KEY_FILE = "data/google_stub_key.pem"
+
+
+def load_or_create_key(path: str) -> rsa.RSAPrivateKey:
+    key_path = Path(path)
+    if key_path.exists():
+        return serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key_path.parent.mkdir(parents=True, exist_ok=True)
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption(),
+    ))
+    return key
+
+
+def certificate_pem(key: rsa.RSAPrivateKey) -> str:
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "cropsense-google-stub")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=365))
+        .sign(key, hashes.SHA256())
+    )
+    return cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def issue_token(key: rsa.RSAPrivateKey, email: str, audience: str, lifetime: int = 3600,
+                key_id: str = KEY_ID) -> str:
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption(),
+    )
+    signer = crypt.RSASigner.from_string(pem, key_id=key_id)
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": audience,
+        "sub": "stub-" + hashlib.sha256(email.encode()).hexdigest()[:21],
+        "email": email,
+        "email_verified": True,
+        "name": email.split("@")[0].title(),
+        "iat": now,
+        "exp": now + lifetime,
+    }
+    return google_jwt.encode(signer, payload).decode()
+
+
+def create_app(key: rsa.RSAPrivateKey, max_age: int = 300) -> FastAPI:
+    stub = FastAPI(title="Google certs stub")
+    certs = {KEY_ID: certificate_pem(key)}
+
+    @stub.get("/oauth2/v1/certs")
+    async def get_certs(response: Response):
+        response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate, no-transform"
+        return certs
+
+    return stub
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Google certs / ID-token stub")
+    parser.add_argument("--key-file", default=DEFAULT_KEY_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8766)
+    serve.add_argument("--max-age", type=int, default=300)
+    token = sub.add_parser("token")
+    token.add_argument("email")
+    token.add_argument("--aud", required=True)
+    args = parser.parse_args()
+
+    signing_key = load_or_create_key(args.key_file)
+    if args.command == "serve":
+        import uvicorn
+        uvicorn.run(create_app(signing_key, args.max_age), host=args.host, port=args.port)
+    else:
+        print(issue_token(signing_key, args.email, args.aud))
@@ -0,0 +1,68 @@
+"""
+Local Plant.id Stub
+--------------------
+A stand-in for the Plant.id v3 health-assessment endpoint, for exercising the
+remote path (including async jobs and retries) without an API key or network:
+
+    python -m app.services.plant_id_stub --port 8765 --delay 2 --fail-rate 0.2
+
+then run the API with
+
+    PLANT_ID_API_KEY=stub
+    PLANT_ID_API_URL=http://127.0.0.1:8765/v3/health_assessment
+
+The stub answers after `--delay` seconds and returns HTTP 503 for a
+`--fail-rate` fraction of calls.  Suggestions are picked from the disease
+library by a hash of the image URL, so repeat requests get the same answer.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+
+from fastapi import FastAPI, Header, HTTPException
+
+from app.services.disease_service import DISEASE_LIBRARY
+
+
+def create_app(delay: float = 0.0, fail_rate: float = 0.0) -> FastAPI:
+    stub = FastAPI(title="Plant.id stub")
+
+    @stub.post("/v3/health_assessment")
+    async def health_assessment(payload: dict, api_key: str = Header("", alias="Api-Key")):
+        if not api_key:
+            raise HTTPException(status_code=401, detail="Missing Api-Key header.")
+        await asyncio.sleep(delay)
+        if random.random() < fail_rate:
+            raise HTTPException(status_code=503, detail="Stub failure.")
+
+        url = (payload.get("images") or [""])[0]
+        entry = DISEASE_LIBRARY[int(hashlib.sha256(url.encode()).hexdigest()[:8], 16) % len(DISEASE_LIBRARY)]
+        return {
+            "result": {
+                "disease": {
+                    "suggestions": [{
+                        "name": entry["diseaseName"],
+                        "probability": 0.82,
+                        "details": {
+                            "treatment": {"chemical": [entry["pesticide"]], "prevention": entry["prevention"][:2]},
+                            "common_uses": entry["prevention"],
+                        },
+                    }],
+                },
+            },
+        }
+
+    return stub
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Plant.id health-assessment stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.delay, args.fail_rate), host=args.host, port=args.port)
@@ -0,0 +1,71 @@
+"""
+Authenticated-Principal Cache
+------------------------------
+`get_current_user` runs on every protected request.  Verifying the JWT is
+cheap, but loading the user is a MongoDB round trip for a document that
+almost never changes, so verified tokens map to their `UserInDB` here.
+
+Each entry lives for PRINCIPAL_CACHE_TTL_SECONDS or until the token itself
+expires, whichever comes first.  Any path that changes a user document must
+call `principal_cache.invalidate(email)` so the edit is visible immediately.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.models.user_model import UserInDB
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: int, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[UserInDB, float]]" = OrderedDict()
+        self._tokens_by_email: Dict[str, Set[str]] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, token: str) -> Optional[UserInDB]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        user, expires_at = entry
+        if time.time() >= expires_at:
+            self._remove(token)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(token)
+        self.stats["hits"] += 1
+        return user
+
+    def put(self, token: str, user: UserInDB, token_exp: Optional[float] = None):
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        if self.ttl_seconds <= 0 or expires_at <= time.time():
+            return
+        self._remove(token)
+        self._entries[token] = (user, expires_at)
+        self._tokens_by_email.setdefault(user.email, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, email: str):
+        """Drop every cached token of this user."""
+        for token in self._tokens_by_email.pop(email, set()):
+            self._entries.pop(token, None)
+        self.stats["invalidations"] += 1
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_email.get(entry[0].email)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_email[entry[0].email]
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_TTL_SECONDS)
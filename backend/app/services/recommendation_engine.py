@@ -1,18 +1,24 @@
 """
 Multi-Mandi Recommendation Engine
 Scores 200+ Indian mandis based on: predicted price, transport distance,
-road connectivity tier, and demand factor to recommend the best selling point.
+road connectivity tier, demand factor and expected spoilage in transit to
+recommend the best selling point.
 """
+import asyncio
 import math
+import time
 from typing import List, Dict
+import numpy as np
 from app.services.price_forecasting import PriceForecastingService
-from app.services.weather_service import get_city_coords
+from app.services.spoilage_model import SpoilageModel, _crop_profile
+from app.services.climatology import climatology, TEMP, HUM
+from app.services.weather_service import WeatherService, get_city_coords
 from app.services.india_mandi_data import (
     get_crop_key, get_state_from_location, get_mandis_for_state,
     INDIA_MANDIS, CROP_BASE_PRICES, STATE_PRICE_FACTORS, TIER_PREMIUMS,
     get_seasonal_multiplier
 )
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 def haversine_km(lat1, lon1, lat2, lon2) -> float:
@@ -27,11 +33,17 @@ def haversine_km(lat1, lon1, lat2, lon2) -> float:
 
 TRANSPORT_COST_PER_KM = 2.5   # ₹ per quintal per km (avg truck)
 MAX_VIABLE_DISTANCE_KM = 600  # beyond this, transport costs outweigh gain
+TRUCK_KM_PER_DAY = 350        # avg loaded-truck progress on Indian highways
+LOADING_DAYS = 0.5            # loading, unloading and auction wait
+TRANSIT_STORAGE = "default"   # covered truck ≈ ordinary warehouse conditions
+PLAN_LATENCY_BUDGET_S = 2.0   # harvest plan: time allowed for the forecast fetch
 
 
 class RecommendationEngine:
     def __init__(self):
         self.price_service = PriceForecastingService()
+        self.spoilage_model = SpoilageModel()
+        self.weather_service = WeatherService()
 
     def _get_candidate_mandis(self, state: str, lat: float, lon: float) -> List[Dict]:
         """Gather mandis: home state + nearby state mandis within 400km."""
@@ -50,44 +62,66 @@ class RecommendationEngine:
         candidates.sort(key=lambda x: x["distance_km"])
         return candidates[:15]
 
-    def _score_mandi(self, mandi: Dict, base_price: float, crop_key: str) -> Dict:
-        """Score a mandi and return enriched dict with recommendation metrics."""
-        dist_km = mandi["distance_km"]
-        tier = mandi["tier"]
-        state = mandi["state"]
+    def _score_mandis(self, candidates: List[Dict], base_price: float, crop_key: str,
+                      temperature: float, humidity: float) -> List[Dict]:
+        """
+        Score all candidate mandis in one vectorised pass, discounting each
+        mandi's price by the expected spoilage loss over its transit time.
+        """
+        dist_km = np.array([m["distance_km"] for m in candidates], dtype=float)
+        tier = np.array([m["tier"] for m in candidates])
 
-        # Price at this mandi
-        state_factor = STATE_PRICE_FACTORS.get(state, 1.0)
-        tier_premium = TIER_PREMIUMS.get(tier, 1.0)
+        # Price at each mandi
+        state_factor = np.array([STATE_PRICE_FACTORS.get(m["state"], 1.0) for m in candidates])
+        tier_premium = np.array([TIER_PREMIUMS.get(t, 1.0) for t in tier])
         month = datetime.utcnow().month
         seasonal = get_seasonal_multiplier(crop_key, month)
-        mandi_price = round(base_price * state_factor * tier_premium * seasonal)
+        mandi_price = np.round(base_price * state_factor * tier_premium * seasonal)
 
-        # Transport cost (₹/quintal)
-        transport_cost = round(dist_km * TRANSPORT_COST_PER_KM, 0)
+        # Transport cost (₹/quintal) and time on the road
+        transport_cost = np.round(dist_km * TRANSPORT_COST_PER_KM)
+        transit_days = LOADING_DAYS + dist_km / TRUCK_KM_PER_DAY
 
-        # Net price after transport
-        net_price = mandi_price - transport_cost
+        # Expected spoilage loss in transit (share of value)
+        n = len(candidates)
+        spoilage = self.spoilage_model.calculate_risk_batch(
+            temperature=np.full(n, temperature),
+            humidity=np.full(n, humidity),
+            storage_type=np.full(n, TRANSIT_STORAGE),
+            transit_days=transit_days,
+            crop=np.full(n, crop_key),
+        )
+        loss_frac = spoilage["estimated_value_loss_pct"] / 100
+        spoilage_loss = np.round(mandi_price * loss_frac)
+
+        # Net price after transport and spoilage
+        net_price = mandi_price - transport_cost - spoilage_loss
 
         # Demand score: tier-1 mandis have higher liquidity
-        demand_score = {1: 95, 2: 78, 3: 60}.get(tier, 70)
+        demand_score = np.array([{1: 95, 2: 78, 3: 60}.get(t, 70) for t in tier])
 
-        # Composite score: weighted sum
+        # Composite score: weighted sum (price term uses the spoilage-adjusted price)
         score = (
-            0.50 * (mandi_price / base_price) * 100 +
+            0.50 * (mandi_price * (1 - loss_frac) / base_price) * 100 +
             0.25 * (1 - dist_km / MAX_VIABLE_DISTANCE_KM) * 100 +
             0.25 * demand_score
         )
 
-        return {
-            **mandi,
-            "mandi_price": mandi_price,
-            "transport_cost_per_qt": int(transport_cost),
-            "net_price_per_qt": int(net_price),
-            "demand_score": demand_score,
-            "composite_score": round(score, 1),
-            "estimated_profit_per_qt": int(net_price - (base_price * 0.7)),
-        }
+        return [
+            {
+                **m,
+                "mandi_price": int(mandi_price[i]),
+                "transport_cost_per_qt": int(transport_cost[i]),
+                "transit_days": round(float(transit_days[i]), 1),
+                "spoilage_loss_pct": round(float(loss_frac[i] * 100), 1),
+                "spoilage_loss_per_qt": int(spoilage_loss[i]),
+                "net_price_per_qt": int(net_price[i]),
+                "demand_score": int(demand_score[i]),
+                "composite_score": round(float(score[i]), 1),
+                "estimated_profit_per_qt": int(net_price[i] - (base_price * 0.7)),
+            }
+            for i, m in enumerate(candidates)
+        ]
 
     async def recommend_market(self, crop: str, location: str) -> dict:
         crop_key = get_crop_key(crop)
@@ -106,8 +140,14 @@ class RecommendationEngine:
             mandis_state = get_mandis_for_state(state)
             candidates = [{**m, "state": state, "distance_km": 50} for m in mandis_state]
 
+        # Origin conditions for spoilage (monthly normals — no network call)
+        normals = climatology.monthly(lat, lon, datetime.utcnow().month)
+
         # Score all candidates
-        scored = [self._score_mandi(m, base_price, crop_key) for m in candidates]
+        scored = self._score_mandis(
+            candidates, base_price, crop_key,
+            temperature=float(normals[TEMP]), humidity=float(normals[HUM]),
+        )
         scored.sort(key=lambda x: x["composite_score"], reverse=True)
 
         best = scored[0]
@@ -126,6 +166,10 @@ class RecommendationEngine:
             reasoning_parts.append(f"{premium}% above your local base price.")
         if best["demand_score"] > 85:
             reasoning_parts.append("Strong buyer demand drives competitive bidding.")
+        if best["spoilage_loss_pct"] >= 5:
+            reasoning_parts.append(
+                f"Allows for ~{best['spoilage_loss_pct']}% spoilage over {best['transit_days']} days in transit."
+            )
 
         explanation = " ".join(reasoning_parts) or (
             f"Best net price after ₹{best['transport_cost_per_qt']}/qt transport."
@@ -138,6 +182,8 @@ class RecommendationEngine:
             "predicted_price": best["mandi_price"],
             "net_price": best["net_price_per_qt"],
             "transport_cost": best["transport_cost_per_qt"],
+            "transit_days": best["transit_days"],
+            "spoilage_loss_pct": best["spoilage_loss_pct"],
             "expected_profit_per_qt": best["estimated_profit_per_qt"],
             "confidence": round(confidence, 2),
             "confidence_pct": round(confidence * 100, 0),
@@ -151,6 +197,8 @@ class RecommendationEngine:
                     "net_price": m["net_price_per_qt"],
                     "score": m["composite_score"],
                     "transport_cost": m["transport_cost_per_qt"],
+                    "transit_days": m["transit_days"],
+                    "spoilage_loss_pct": m["spoilage_loss_pct"],
                     "tier": m["tier"],
                 }
                 for m in top3
@@ -158,3 +206,119 @@ class RecommendationEngine:
             "crop": crop,
             "location": resolved_city,
         }
+
+    # ── Harvest-and-sell timing ───────────────────────────────────────────
+    async def _daily_conditions(self, lat: float, lon: float, days: int, budget_s: float):
+        """Daily mean temperature/humidity for the horizon; climatology if the forecast is slow."""
+        hours = days * 24
+        try:
+            window, source = await asyncio.wait_for(
+                self.weather_service.get_forecast_window(lat, lon, hours), timeout=max(budget_s, 0.05)
+            )
+        except Exception:
+            window = None
+        if window is None or window.shape[1] < hours:
+            forecast = self.weather_service.climatology_hourly(lat, lon, days)
+            window, source = forecast.window(time.time(), hours), forecast.source
+        # Average each 24 h block
+        daily = np.asarray(window, dtype=float).reshape(2, days, 24).mean(axis=2)
+        return daily[0], daily[1], source
+
+    async def plan_harvest_and_sale(self, crop: str, location: str, storage_type: str = "warehouse",
+                                    horizon_days: int = 14, alternatives: int = 3) -> dict:
+        """
+        Evaluate every (sell day, mandi) pair over the horizon as one matrix:
+        forecast price × state/tier factors − transport − expected spoilage loss
+        (storage until the sell day, then transit).
+        """
+        started = time.perf_counter()
+        crop_key = get_crop_key(crop)
+        state = get_state_from_location(location)
+        (lat, lon), resolved_city = get_city_coords(location)
+
+        price_data = await self.price_service.predict_price(crop, location)
+        prices = np.asarray(price_data["predicted_prices"], dtype=float)
+        days = max(1, min(horizon_days, len(prices)))
+        prices = prices[:days]
+
+        candidates = self._get_candidate_mandis(state, lat, lon)
+        if not candidates:
+            candidates = [{**m, "state": state, "distance_km": 50} for m in get_mandis_for_state(state)]
+
+        remaining = PLAN_LATENCY_BUDGET_S - (time.perf_counter() - started)
+        temps, hums, weather_source = await self._daily_conditions(lat, lon, days, remaining)
+
+        # ── Mandi axis ──
+        dist_km = np.array([m["distance_km"] for m in candidates], dtype=float)
+        factor = np.array([
+            STATE_PRICE_FACTORS.get(m["state"], 1.0) * TIER_PREMIUMS.get(m["tier"], 1.0) for m in candidates
+        ])
+        transport = np.round(dist_km * TRANSPORT_COST_PER_KM)
+        transit_days = LOADING_DAYS + dist_km / TRUCK_KM_PER_DAY
+
+        # ── Spoilage: storage hazard accumulated before day d, then transit on day d ──
+        store_rate = self.spoilage_model.daily_loss_rate(temps, hums, storage_type, crop_key) / 100
+        transit_rate = self.spoilage_model.daily_loss_rate(temps, hums, TRANSIT_STORAGE, crop_key) / 100
+        stored_hazard = np.concatenate(([0.0], np.cumsum(store_rate)[:-1]))
+        hazard = stored_hazard[:, None] + transit_rate[:, None] * transit_days[None, :]
+        probability = np.clip(1 - np.exp(-hazard), 0.02, 0.97)
+        loss_frac = probability * _crop_profile(crop_key)["sensitivity"]
+
+        # ── (day × mandi) matrices ──
+        gross = np.round(prices[:, None] * factor[None, :])
+        spoilage_loss = np.round(gross * loss_frac)
+        net = gross - transport[None, :] - spoilage_loss
+
+        today = datetime.utcnow().date()
+
+        def plan(d: int, m: int) -> dict:
+            mandi = candidates[m]
+            return {
+                "sell_day": d,
+                "date": (today + timedelta(days=d)).isoformat(),
+                "mandi": mandi["name"],
+                "state": mandi["state"].title(),
+                "distance_km": mandi["distance_km"],
+                "transit_days": round(float(transit_days[m]), 1),
+                "price": int(gross[d, m]),
+                "transport_cost": int(transport[m]),
+                "spoilage_loss": int(spoilage_loss[d, m]),
+                "spoilage_loss_pct": round(float(loss_frac[d, m] * 100), 1),
+                "net_price": int(net[d, m]),
+            }
+
+        # Best day per mandi, then mandis ranked by their best net price
+        best_day = net.argmax(axis=0)
+        best_net = net[best_day, np.arange(len(candidates))]
+        ranked = np.argsort(-best_net)
+        best = plan(int(best_day[ranked[0]]), int(ranked[0]))
+        runners_up = [plan(int(best_day[m]), int(m)) for m in ranked[1:1 + alternatives]]
+        sell_now = plan(0, int(net[0].argmax()))
+
+        if best["sell_day"] == 0:
+            explanation = f"Sell now at {best['mandi']} — waiting does not beat storage losses and price moves."
+        else:
+            explanation = (
+                f"Hold {best['sell_day']} day(s) in {storage_type} and sell at {best['mandi']}: "
+                f"₹{best['net_price'] - sell_now['net_price']}/qt more than selling today "
+                f"after ₹{best['spoilage_loss']}/qt expected spoilage."
+            )
+
+        return {
+            "crop": crop,
+            "location": resolved_city,
+            "storage_type": storage_type,
+            "horizon_days": days,
+            "unit": price_data["unit"],
+            "best_plan": best,
+            "alternatives": runners_up,
+            "sell_now": sell_now,
+            "gain_vs_sell_now": best["net_price"] - sell_now["net_price"],
+            "explanation": explanation,
+            "matrix": {
+                "mandis": [m["name"] for m in candidates],
+                "net_price": net.astype(np.int64).tolist(),   # [sell_day][mandi]
+            },
+            "weather_source": weather_source,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
@@ -0,0 +1,88 @@
+"""
+Leaf-Image Thumbnails
+----------------------
+History lists only need a small preview, so each scan also gets a 256 px
+WebP thumbnail, stored next to the original in the blob store:
+
+    <BLOB_STORE_DIR>/ab/cd/<sha256>_thumb.webp
+
+Decoding and resizing are CPU-bound and hold the GIL, so they run in a
+`ProcessPoolExecutor`; JPEG draft mode decodes large photos at reduced scale
+to keep worker memory low.  Cloudinary images use an on-the-fly
+transformation URL instead.  Pillow is optional — without it no local
+thumbnails are produced and history falls back to the full image.
+"""
+import asyncio
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.services import blob_store
+
+# ── Optional Pillow import ───────────────────────────────────────────────────
+try:
+    from PIL import Image
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+THUMBNAIL_SIZE = 256
+THUMBNAIL_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+CLOUDINARY_TRANSFORM = f"c_limit,w_{THUMBNAIL_SIZE},h_{THUMBNAIL_SIZE},f_webp,q_auto"
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Bounds image payloads queued for the workers during upload bursts
+_thumbnail_slots = asyncio.Semaphore(THUMBNAIL_WORKERS * 2)
+
+
+def render_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> Optional[bytes]:
+    """Decode an image and return a WebP thumbnail, or None if it cannot be decoded.
+    Runs inside worker processes, so it must stay a picklable top-level function."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft("RGB", (size, size))        # JPEG: decode at 1/2–1/8 scale
+            img = img.convert("RGB")
+            img.thumbnail((size, size))
+            out = io.BytesIO()
+            img.save(out, format="WEBP", quality=80, method=4)
+            return out.getvalue()
+    except Exception:
+        return None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    return _pool
+
+
+def shutdown_pool(wait: bool = False):
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool = None
+
+
+def cloudinary_thumbnail_url(image_url: str) -> Optional[str]:
+    """Delivery URL that makes Cloudinary resize and re-encode on first request."""
+    if "/image/upload/" not in image_url:
+        return None
+    return image_url.replace("/image/upload/", f"/image/upload/{CLOUDINARY_TRANSFORM}/", 1)
+
+
+async def create_local_thumbnail(data: bytes, sha256_hex: str) -> Optional[str]:
+    """Render the thumbnail in the process pool, store it and return its URL."""
+    if not _PIL_AVAILABLE:
+        return None
+    key = f"{sha256_hex}_thumb.webp"
+    if blob_store.blob_store.find(key) is not None:
+        return blob_store.blob_url(key)
+
+    async with _thumbnail_slots:
+        thumb = await asyncio.get_running_loop().run_in_executor(_get_pool(), render_thumbnail, data)
+    if thumb is None:
+        return None
+    key = await blob_store.blob_store.put_async(thumb, f"{sha256_hex}_thumb", "webp")
+    return blob_store.blob_url(key)
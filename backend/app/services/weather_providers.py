@@ -0,0 +1,177 @@
+"""
+Weather Provider Abstraction + Hedged Fetch
+--------------------------------------------
+Normalises Open-Meteo and OpenWeatherMap responses into the `WeatherData`
+shape used by the yield engine.
+
+`HedgedWeatherFetcher` asks the primary provider first.  If it has not
+answered within its observed p95 latency, a second (hedged) request goes to
+the next provider; whichever returns first wins and the loser is cancelled.
+Because the hedge only fires for the slowest ~5% of calls, upstream load
+grows by roughly 5% instead of doubling.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import List, Optional
+
+import httpx
+
+from app.config import settings
+from app.models.yield_model import WeatherData
+from app.services.climatology import seasonal_rainfall_estimate
+
+
+class WeatherProvider:
+    """
+    Base class — subclasses fetch current conditions for a coordinate.
+
+    `rainfall_forecast` is always the normal rainfall for the coming 6-month
+    season (see `seasonal_rainfall_estimate`), never a scaled-up reading of
+    today's rain, so the yield engine sees the same scale whichever provider
+    answers a hedged request.
+    """
+    name = "base"
+    timeout = 8.0
+
+    def is_configured(self) -> bool:
+        return True
+
+    async def fetch(self, lat: float, lon: float) -> WeatherData:
+        raise NotImplementedError
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """Open-Meteo (free, no key).  Also serves WeatherService's dashboard and hourly requests."""
+    name = "open-meteo"
+    BASE_URL = "https://api.open-meteo.com/v1/forecast"
+
+    async def request(self, lat: float, lon: float, timeout: Optional[float] = None, **params) -> dict:
+        """Raw Open-Meteo forecast response for a coordinate."""
+        async with httpx.AsyncClient(timeout=timeout or self.timeout) as client:
+            resp = await client.get(self.BASE_URL, params={"latitude": lat, "longitude": lon, **params})
+            resp.raise_for_status()
+            return resp.json()
+
+    async def fetch(self, lat: float, lon: float) -> WeatherData:
+        from app.services.weather_service import wmo_to_description
+
+        d = await self.request(
+            lat, lon,
+            current="temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code",
+            wind_speed_unit="ms",
+            timezone="Asia/Kolkata",
+        )
+        current = d["current"]
+        return WeatherData(
+            temperature=current["temperature_2m"],
+            humidity=current["relative_humidity_2m"],
+            rainfall_forecast=seasonal_rainfall_estimate(lat, lon),
+            wind_speed=current["wind_speed_10m"],
+            description=wmo_to_description(int(current.get("weather_code", 1))),
+        )
+
+
+class OpenWeatherMapProvider(WeatherProvider):
+    """OpenWeatherMap current weather (requires WEATHER_API_KEY)."""
+    name = "openweathermap"
+    BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+    def is_configured(self) -> bool:
+        return bool(settings.WEATHER_API_KEY)
+
+    async def fetch(self, lat: float, lon: float) -> WeatherData:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            resp = await client.get(self.BASE_URL, params={
+                "lat": lat,
+                "lon": lon,
+                "appid": settings.WEATHER_API_KEY,
+                "units": "metric",
+            })
+            resp.raise_for_status()
+            d = resp.json()
+
+        return WeatherData(
+            temperature=d["main"]["temp"],
+            humidity=d["main"]["humidity"],
+            rainfall_forecast=seasonal_rainfall_estimate(lat, lon),
+            wind_speed=d["wind"]["speed"],
+            description=d["weather"][0]["description"].title(),
+        )
+
+
+# ── Latency tracking ──────────────────────────────────────────────────────────
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds) for one provider."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20, default_delay: float = 1.5):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self) -> float:
+        """p95 latency, or the default delay until enough samples exist."""
+        if len(self.samples) < self.min_samples:
+            return self.default_delay
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class HedgedWeatherFetcher:
+    def __init__(self, providers: List[WeatherProvider], hedge_delay_floor: float = 0.05):
+        self.providers = providers
+        self.hedge_delay_floor = hedge_delay_floor
+        self.latency = {p.name: LatencyTracker() for p in providers}
+        self.stats = {"primary_wins": 0, "hedge_wins": 0, "hedges_sent": 0, "failures": 0}
+
+    async def _timed(self, provider: WeatherProvider, lat: float, lon: float) -> WeatherData:
+        started = time.perf_counter()
+        result = await provider.fetch(lat, lon)
+        self.latency[provider.name].record(time.perf_counter() - started)
+        return result
+
+    async def fetch(self, lat: float, lon: float) -> Optional[WeatherData]:
+        """Return normalised weather from the fastest provider, or None if all fail."""
+        active = [p for p in self.providers if p.is_configured()]
+        if not active:
+            return None
+
+        primary = active[0]
+        tasks = {asyncio.ensure_future(self._timed(primary, lat, lon)): primary}
+        pending_backups = active[1:]
+
+        try:
+            delay = max(self.hedge_delay_floor, self.latency[primary.name].p95())
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and pending_backups:
+                backup = pending_backups.pop(0)
+                tasks[asyncio.ensure_future(self._timed(backup, lat, lon))] = backup
+                self.stats["hedges_sent"] += 1
+
+            waiting = set(tasks)
+            while waiting:
+                done, waiting = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        key = "primary_wins" if tasks[task] is primary else "hedge_wins"
+                        self.stats[key] += 1
+                        return task.result()
+                # Every in-flight request failed — fail over to the next provider
+                if not waiting and pending_backups:
+                    backup = pending_backups.pop(0)
+                    waiting = {asyncio.ensure_future(self._timed(backup, lat, lon))}
+                    tasks[next(iter(waiting))] = backup
+
+            self.stats["failures"] += 1
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+# Primary is OpenWeatherMap when a key is configured, Open-Meteo otherwise.
+hedged_fetcher = HedgedWeatherFetcher([OpenWeatherMapProvider(), OpenMeteoProvider()])
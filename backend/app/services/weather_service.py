@@ -1,10 +1,15 @@
 """
 Real Weather Service — uses Open-Meteo API (100% free, no API key needed)
-Provides current conditions + 7-day forecast for any India location.
+Provides current conditions + 7-day forecast for any India location, plus an
+extended 16-day hourly mode stored as compact per-cell arrays.
 """
-import httpx
+import time
 import math
+import numpy as np
 from app.services.india_mandi_data import CITY_STATE_MAP, get_state_from_location
+from app.services.climatology import climatology, cell_index, TEMP, RAIN, HUM
+from app.services.forecast_store import hourly_store, CellForecast, HOUR
+from app.services.weather_providers import OpenMeteoProvider
 
 # City → (lat, lon) for major Indian cities
 INDIA_CITY_COORDS = {
@@ -80,22 +85,23 @@ def get_city_coords(location: str):
 
 
 class WeatherService:
-    BASE_URL = "https://api.open-meteo.com/v1/forecast"
+    MAX_FORECAST_DAYS = 16
+    FALLBACK_TTL_SECONDS = 10 * 60      # retry Open-Meteo soon after an outage
+    TIMEOUT = 10.0
+
+    def __init__(self):
+        self.open_meteo = OpenMeteoProvider()
 
     async def get_weather(self, location: str) -> dict:
         (lat, lon), resolved_city = get_city_coords(location)
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(self.BASE_URL, params={
-                    "latitude": lat,
-                    "longitude": lon,
-                    "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code,precipitation",
-                    "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,weather_code,wind_speed_10m_max",
-                    "timezone": "Asia/Kolkata",
-                    "forecast_days": 7,
-                })
-                resp.raise_for_status()
-                data = resp.json()
+            data = await self.open_meteo.request(
+                lat, lon, timeout=self.TIMEOUT,
+                current="temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code,precipitation",
+                daily="temperature_2m_max,temperature_2m_min,precipitation_sum,weather_code,wind_speed_10m_max",
+                timezone="Asia/Kolkata",
+                forecast_days=7,
+            )
 
             current = data.get("current", {})
             daily = data.get("daily", {})
@@ -142,17 +148,80 @@ class WeatherService:
             # Graceful fallback with seasonal estimates
             return self._fallback_weather(location, lat, lon, resolved_city)
 
+    async def get_hourly_forecast(self, lat: float, lon: float, days: int = 16) -> CellForecast:
+        """
+        Hourly temperature/humidity up to 16 days out for the 0.25° cell containing
+        (lat, lon), covering `days` UTC days from today's 00:00.  Cached per cell;
+        callers slice the returned arrays without copying.
+        """
+        days = max(1, min(days, self.MAX_FORECAST_DAYS))
+        cell = cell_index(lat, lon)
+        cached = hourly_store.get(cell)
+        # Judge by the end of the series, not its length: an entry fetched
+        # before 00:00 UTC starts a day early and runs out a day early
+        horizon = int(time.time()) // 86400 * 86400 + days * 86400
+        if cached is not None and cached.end >= horizon:
+            return cached
+
+        try:
+            hourly = (await self.open_meteo.request(
+                lat, lon, timeout=self.TIMEOUT,
+                hourly="temperature_2m,relative_humidity_2m",
+                timeformat="unixtime",
+                timezone="GMT",
+                forecast_days=days,
+            ))["hourly"]
+
+            temps = np.asarray(hourly["temperature_2m"], dtype=np.float32)
+            hums = np.asarray(hourly["relative_humidity_2m"], dtype=np.float32)
+            # Fill occasional gaps so downstream cumulative sums stay finite
+            for arr in (temps, hums):
+                if np.isnan(arr).any():
+                    idx = np.arange(arr.size)
+                    ok = ~np.isnan(arr)
+                    arr[~ok] = np.interp(idx[~ok], idx[ok], arr[ok])
+            return hourly_store.put(cell, hourly["time"][0], temps, hums, source="open-meteo")
+
+        except Exception:
+            return self.climatology_hourly(lat, lon, days)
+
+    async def get_forecast_window(self, lat: float, lon: float, hours: int):
+        """
+        (2, ≤hours) temperature/humidity view starting at the current hour, plus
+        its source.  Shorter than `hours` only past the 16-day forecast horizon.
+        """
+        now = time.time()
+        # Open-Meteo series start at 00:00 UTC, so also cover the hours already gone today
+        elapsed = int(now % 86400) // HOUR
+        forecast = await self.get_hourly_forecast(lat, lon, days=math.ceil((elapsed + hours) / 24))
+        return forecast.window(now, hours), forecast.source
+
+    def climatology_hourly(self, lat: float, lon: float, days: int) -> CellForecast:
+        """
+        Hourly series from the current hour, synthesised from monthly normals
+        with a diurnal cycle.  Used when Open-Meteo is down or too slow; cached
+        only for FALLBACK_TTL_SECONDS.
+        """
+        start = int(time.time()) // HOUR * HOUR
+        hours = np.arange(days * 24)
+        month = time.gmtime(start).tm_mon
+        normals = climatology.monthly(lat, lon, month)
+        # IST afternoon peak ≈ 09:00 UTC; ±5°C swing, humidity moves opposite
+        phase = np.sin(2 * np.pi * ((start // HOUR + hours - 3) % 24) / 24)
+        temps = normals[TEMP] + 5.0 * phase
+        hums = np.clip(normals[HUM] - 12.0 * phase, 5, 100)
+        return hourly_store.put(cell_index(lat, lon), start, temps, hums, source="climatology",
+                                ttl_seconds=self.FALLBACK_TTL_SECONDS)
+
     def _fallback_weather(self, location: str, lat: float, lon: float, city: str) -> dict:
         import datetime as dt_module
         month = dt_module.datetime.utcnow().month
-        # Seasonal temp/humidity for India
-        seasonal_temp = [22, 24, 28, 34, 38, 35, 31, 30, 30, 28, 24, 21]
-        seasonal_hum  = [55, 50, 45, 40, 45, 70, 80, 82, 78, 65, 55, 55]
-        seasonal_rain = [2, 3, 5, 8, 15, 50, 120, 110, 80, 25, 8, 3]
-
-        temp = seasonal_temp[month - 1]
-        humidity = seasonal_hum[month - 1]
-        rain = seasonal_rain[month - 1]
+        # Gridded monthly normals for this cell (national profile if no store is built)
+        normals = climatology.monthly(lat, lon, month)
+
+        temp = round(float(normals[TEMP]), 1)
+        humidity = int(round(float(normals[HUM])))
+        rain = int(round(float(normals[RAIN])))
         desc = "Mostly Sunny" if humidity < 60 else ("Partly Cloudy" if humidity < 75 else "Light Rain")
 
         return {
@@ -2,23 +2,35 @@
 Yield & Profit Prediction Engine.
 
 Logic flow:
-  1. Fetch real-time weather for the given coordinates.
+  1. Fetch real-time weather for the given coordinates (hedged across providers).
   2. Look up crop knowledge-base (base yield, ideal conditions, MSP price, costs).
   3. Compute adjustment factors from weather + soil + irrigation.
   4. Return structured prediction with profit/loss and risk level.
 """
+import asyncio
 import hashlib
 import math
-import httpx
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
-from app.config import settings
 from app.models.yield_model import (
     YieldPredictionRequest,
     YieldPredictionResult,
+    YieldRiskSimulation,
+    YieldBatchItem,
+    YieldBatchResult,
+    CropComparisonRequest,
+    CropComparisonItem,
+    CropComparisonResult,
+    SensitivityRequest,
+    SensitivityResult,
     WeatherData,
 )
+from app.services.climatology import climatology, cell_index, TEMP, RAIN, HUM
+from app.services.weather_providers import hedged_fetcher
+from app.services.yield_tiles import yield_tiles
 
 
 # ── Crop Knowledge Base ───────────────────────────────────────────────────────
@@ -160,54 +172,39 @@ CROP_TIPS = {
 
 # ── Weather Fetch ─────────────────────────────────────────────────────────────
 async def _fetch_weather(lat: float, lon: float) -> WeatherData:
-    """Fetch current weather from OpenWeatherMap; fall back to mock if key missing."""
-    api_key = getattr(settings, "openweather_api_key", None)
-
-    if api_key:
-        url = (
-            f"https://api.openweathermap.org/data/2.5/weather"
-            f"?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-        )
-        try:
-            async with httpx.AsyncClient(timeout=8) as client:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                d = resp.json()
-                return WeatherData(
-                    temperature=d["main"]["temp"],
-                    humidity=d["main"]["humidity"],
-                    rainfall_forecast=_estimate_seasonal_rainfall(d),
-                    wind_speed=d["wind"]["speed"],
-                    description=d["weather"][0]["description"].title(),
-                )
-        except Exception:
-            pass  # fall through to mock
+    """Fetch current weather via the hedged provider chain; fall back to mock if all fail."""
+    weather = await hedged_fetcher.fetch(lat, lon)
+    if weather is not None:
+        return weather
 
     # ── Deterministic mock based on coordinates ──
     return _mock_weather(lat, lon)
 
 
-def _estimate_seasonal_rainfall(owm_data: dict) -> float:
-    """Estimate seasonal rainfall from OWM current rain data (1h) * season multiplier."""
-    rain_1h = owm_data.get("rain", {}).get("1h", 0)
-    return round(rain_1h * 4320, 1)   # 4320 = hours in 6-month season
-
-
 def _mock_weather(lat: float, lon: float) -> WeatherData:
-    """Deterministic mock weather using geographic position."""
+    """Offline weather: gridded climatology if built, else a deterministic coordinate mock."""
     # Use lat/lon hash for variety
     seed = int(hashlib.md5(f"{lat:.2f}{lon:.2f}".encode()).hexdigest(), 16) % 1000
 
-    # Temperature: warmer in southern lat, cooler in northern
-    base_temp = 20 + (20 - abs(lat)) * 0.5 + (seed % 8) - 4
-    temperature = round(max(10, min(42, base_temp)), 1)
-
-    # Humidity: higher near coast / rivers (longitude 70-85 = India's humid belt)
-    humidity = round(40 + (seed % 40) + max(0, 15 - abs(lon - 77)), 1)
-    humidity = min(95, humidity)
-
-    # Seasonal rainfall estimate (mm)
-    rainfall = round(300 + (seed % 500) + abs(lat - 23) * 15, 1)
+    if climatology.available:
+        month = datetime.utcnow().month
+        normals = climatology.monthly(lat, lon, month)
+        temperature = round(float(normals[TEMP]), 1)
+        humidity = round(float(normals[HUM]), 1)
+        rainfall = round(climatology.seasonal_rainfall(lat, lon, month), 1)
+        source = "climatology"
+    else:
+        # Temperature: warmer in southern lat, cooler in northern
+        base_temp = 20 + (20 - abs(lat)) * 0.5 + (seed % 8) - 4
+        temperature = round(max(10, min(42, base_temp)), 1)
+
+        # Humidity: higher near coast / rivers (longitude 70-85 = India's humid belt)
+        humidity = round(40 + (seed % 40) + max(0, 15 - abs(lon - 77)), 1)
+        humidity = min(95, humidity)
+
+        # Seasonal rainfall estimate (mm)
+        rainfall = round(300 + (seed % 500) + abs(lat - 23) * 15, 1)
+        source = "mock"
 
     wind_speed = round(2 + (seed % 15) * 0.5, 1)
     descs = ["Clear Sky", "Partly Cloudy", "Broken Clouds", "Light Showers", "Overcast"]
@@ -219,6 +216,7 @@ def _mock_weather(lat: float, lon: float) -> WeatherData:
         rainfall_forecast=rainfall,
         wind_speed=wind_speed,
         description=description,
+        source=source,
     )
 
 
@@ -251,6 +249,170 @@ def _risk_from_factors(combined_factor: float) -> str:
     return "High"
 
 
+# ── Vectorised crop table ─────────────────────────────────────────────────────
+# The same factors as above, laid out as NumPy arrays indexed by crop / soil so
+# many farms or scenarios can be evaluated in one pass.
+CROP_KEYS = list(CROP_DB)
+CROP_INDEX = {k: i for i, k in enumerate(CROP_KEYS)}
+SOIL_KEYS = ["alluvial", "black", "clay", "red", "sandy"]
+SOIL_INDEX = {k: i for i, k in enumerate(SOIL_KEYS)}
+RISK_LEVELS = np.array(["Low", "Medium", "High"])
+
+
+def _build_crop_table() -> Dict[str, np.ndarray]:
+    crops = [CROP_DB[k] for k in CROP_KEYS]
+    return {
+        "base_yield": np.array([c["base_yield_acre"] for c in crops]),
+        "temp_lo": np.array([c["ideal_temp"][0] for c in crops], dtype=float),
+        "temp_hi": np.array([c["ideal_temp"][1] for c in crops], dtype=float),
+        "rain_lo": np.array([c["ideal_rainfall"][0] for c in crops], dtype=float),
+        "rain_hi": np.array([c["ideal_rainfall"][1] for c in crops], dtype=float),
+        "soil_bonus": np.array([[c["soil_bonus"].get(s, 0) for s in SOIL_KEYS] for c in crops]),
+        "irr_bonus": np.array([c["irrigation_bonus"] for c in crops]),
+        "price": np.array([c["msp_price"] for c in crops], dtype=float),
+        "cost_per_acre": np.array(
+            [c["seed_cost_acre"] + c["fertilizer_cost_acre"] + c["labor_cost_acre"] for c in crops],
+            dtype=float,
+        ),
+    }
+
+
+CROP_TABLE = _build_crop_table()
+
+
+def _soil_key(soil_type: str) -> str:
+    return SOIL_KEY_MAP.get(soil_type.lower().strip(), "alluvial")
+
+
+def _to_acres(land_size, unit):
+    """Convert hectares → acres (1 ha = 2.471 acres); works on scalars and arrays."""
+    return np.where(np.asarray(unit) == "acres", land_size, np.asarray(land_size) * 2.471)
+
+
+def _temp_factor_np(temp, lo, hi):
+    """Vectorised `_temp_factor`."""
+    deviation = np.maximum(lo - temp, 0) + np.maximum(temp - hi, 0)
+    return np.maximum(0.55, 1.0 - deviation * 0.025)
+
+
+def _rainfall_factor_np(rainfall, lo, hi):
+    """Vectorised `_rainfall_factor`."""
+    deficit = np.maximum(lo - rainfall, 0) / lo
+    excess = np.maximum(rainfall - hi, 0) / hi
+    return np.where(
+        rainfall < lo,
+        np.maximum(0.50, 1.0 - deficit * 0.8),
+        np.maximum(0.65, 1.0 - excess * 0.5),
+    )
+
+
+def _risk_codes(weather_factor):
+    """Vectorised `_risk_from_factors`: 0 = Low, 1 = Medium, 2 = High."""
+    return np.where(weather_factor >= 0.85, 0, np.where(weather_factor >= 0.65, 1, 2))
+
+
+def _evaluate(crop_idx, soil_idx, irrigation, temperature, rainfall, land_acres, price_factor=1.0) -> Dict[str, np.ndarray]:
+    """
+    Evaluate yield, financials and risk for broadcastable arrays of inputs.
+    Mirrors the scalar arithmetic in `predict_yield`.
+    """
+    T = CROP_TABLE
+    t_factor = _temp_factor_np(temperature, T["temp_lo"][crop_idx], T["temp_hi"][crop_idx])
+    r_factor = _rainfall_factor_np(rainfall, T["rain_lo"][crop_idx], T["rain_hi"][crop_idx])
+    soil_bonus = T["soil_bonus"][crop_idx, soil_idx]
+    irr_bonus = np.where(irrigation, T["irr_bonus"][crop_idx], 0.0)
+
+    combined = np.minimum(t_factor * r_factor * (1 + soil_bonus) * (1 + irr_bonus), 1.40)
+    yield_per_acre = np.round(T["base_yield"][crop_idx] * combined, 3)
+    total_yield = np.round(yield_per_acre * land_acres, 2)
+
+    revenue = np.round(total_yield * T["price"][crop_idx] * price_factor)
+    total_cost = np.round(T["cost_per_acre"][crop_idx] * land_acres)
+    return {
+        "yield_per_acre": yield_per_acre,
+        "total_yield": total_yield,
+        "revenue": revenue,
+        "cost": total_cost,
+        "profit": revenue - total_cost,
+        "risk": _risk_codes(t_factor * r_factor),
+    }
+
+
+def _weather_summary(weather: WeatherData) -> str:
+    return (
+        f"{weather.description} · {weather.temperature}°C · "
+        f"Humidity {weather.humidity}% · Estimated seasonal rainfall {weather.rainfall_forecast} mm"
+    )
+
+
+# ── Monte Carlo Risk Simulation ───────────────────────────────────────────────
+TEMP_SIGMA = 2.5          # °C spread of season-average temperature around the estimate
+RAIN_LOG_SIGMA = 0.30     # log-normal spread of seasonal rainfall (~±30%)
+PRICE_LOG_SIGMA = 0.10    # log-normal spread of the realised market price
+
+
+def simulate_yield(
+    crop_key: str,
+    soil_key: str,
+    irrigation: bool,
+    land_acres: float,
+    weather: WeatherData,
+    lat: float,
+    lon: float,
+    n: int = 10000,
+    rng: Optional[np.random.Generator] = None,
+) -> YieldRiskSimulation:
+    """
+    Sample `n` season scenarios around the forecast (blended with climatology
+    when available) and push them through the yield factors as arrays.
+    """
+    rng = rng or np.random.default_rng()
+
+    temp_mu, rain_mu = weather.temperature, max(weather.rainfall_forecast, 1.0)
+    temp_sigma = TEMP_SIGMA
+    if climatology.available:
+        month = datetime.utcnow().month
+        normal_temp = float(climatology.monthly(lat, lon, month)[TEMP])
+        normal_rain = max(climatology.seasonal_rainfall(lat, lon, month), 1.0)
+        temp_mu = 0.5 * (temp_mu + normal_temp)
+        rain_mu = math.sqrt(rain_mu * normal_rain)   # geometric blend for a log-normal
+        # Disagreement between forecast and normals widens the spread
+        temp_sigma += 0.5 * abs(weather.temperature - normal_temp)
+
+    temperature = rng.normal(temp_mu, temp_sigma, n)
+    rainfall = rain_mu * np.exp(rng.normal(0.0, RAIN_LOG_SIGMA, n))
+    price_factor = np.exp(rng.normal(0.0, PRICE_LOG_SIGMA, n))
+
+    out = _evaluate(
+        crop_idx=CROP_INDEX[crop_key],
+        soil_idx=SOIL_INDEX[soil_key],
+        irrigation=irrigation,
+        temperature=temperature,
+        rainfall=rainfall,
+        land_acres=land_acres,
+        price_factor=price_factor,
+    )
+    profit, total_yield = out["profit"], out["total_yield"]
+    p5, p25, p50, p75, p95 = np.percentile(profit, [5, 25, 50, 75, 95])
+    y5, y50, y95 = np.percentile(total_yield, [5, 50, 95])
+    risk_share = np.bincount(out["risk"], minlength=3) / n
+
+    return YieldRiskSimulation(
+        scenarios=n,
+        profitP5=round(float(p5)),
+        profitP25=round(float(p25)),
+        profitP50=round(float(p50)),
+        profitP75=round(float(p75)),
+        profitP95=round(float(p95)),
+        meanProfit=round(float(profit.mean())),
+        lossProbability=round(float((profit < 0).mean()), 4),
+        yieldP5=round(float(y5), 2),
+        yieldP50=round(float(y50), 2),
+        yieldP95=round(float(y95), 2),
+        riskDistribution={level: round(float(share), 4) for level, share in zip(RISK_LEVELS, risk_share)},
+    )
+
+
 # ── Main Prediction Function ──────────────────────────────────────────────────
 async def predict_yield(req: YieldPredictionRequest) -> YieldPredictionResult:
     crop_key = req.crop.lower().strip()
@@ -263,20 +425,31 @@ async def predict_yield(req: YieldPredictionRequest) -> YieldPredictionResult:
     # Convert hectares → acres (1 ha = 2.471 acres)
     land_acres = req.landSize if req.unit == "acres" else req.landSize * 2.471
 
-    # ── Fetch weather ──
-    weather = await _fetch_weather(req.latitude, req.longitude)
+    # ── Precomputed tile (nightly, from climatology) — live path as fallback ──
+    tile = yield_tiles.lookup(crop_key, soil_key, req.irrigation, req.latitude, req.longitude)
+    if tile is not None:
+        yield_per_acre, risk = tile
+        # The normals the tile was built from; weatherData.source says "climatology"
+        weather = _mock_weather(req.latitude, req.longitude)
+    else:
+        # ── Fetch weather ──
+        weather = await _fetch_weather(req.latitude, req.longitude)
+
+        # ── Compute factors ──
+        t_factor = _temp_factor(weather.temperature, crop["ideal_temp"])
+        r_factor = _rainfall_factor(weather.rainfall_forecast, crop["ideal_rainfall"])
+        soil_bonus = crop["soil_bonus"].get(soil_key, 0)
+        irr_bonus = crop["irrigation_bonus"] if req.irrigation else 0
 
-    # ── Compute factors ──
-    t_factor = _temp_factor(weather.temperature, crop["ideal_temp"])
-    r_factor = _rainfall_factor(weather.rainfall_forecast, crop["ideal_rainfall"])
-    soil_bonus = crop["soil_bonus"].get(soil_key, 0)
-    irr_bonus = crop["irrigation_bonus"] if req.irrigation else 0
+        combined = t_factor * r_factor * (1 + soil_bonus) * (1 + irr_bonus)
+        combined = min(combined, 1.40)   # cap at +40%
 
-    combined = t_factor * r_factor * (1 + soil_bonus) * (1 + irr_bonus)
-    combined = min(combined, 1.40)   # cap at +40%
+        yield_per_acre = round(crop["base_yield_acre"] * combined, 3)
+
+        # ── Risk ──
+        risk = _risk_from_factors(t_factor * r_factor)
 
     # ── Yield ──
-    yield_per_acre = round(crop["base_yield_acre"] * combined, 3)
     total_yield = round(yield_per_acre * land_acres, 2)
 
     # ── Financials ──
@@ -285,14 +458,8 @@ async def predict_yield(req: YieldPredictionRequest) -> YieldPredictionResult:
     total_cost = round(cost_per_acre * land_acres)
     profit = revenue - total_cost
 
-    # ── Risk ──
-    risk = _risk_from_factors(t_factor * r_factor)
-
     # ── Weather summary ──
-    weather_summary = (
-        f"{weather.description} · {weather.temperature}°C · "
-        f"Humidity {weather.humidity}% · Estimated seasonal rainfall {weather.rainfall_forecast} mm"
-    )
+    weather_summary = _weather_summary(weather)
 
     # ── Recommendations ──
     base_tips = CROP_TIPS.get(crop_key, [])
@@ -303,6 +470,21 @@ async def predict_yield(req: YieldPredictionRequest) -> YieldPredictionResult:
     }
     recommendations = [risk_tips[risk]] + base_tips[:4]
 
+    # ── Optional Monte Carlo risk simulation ──
+    simulation = None
+    if req.simulate:
+        # CPU-bound array work — keep it off the event loop
+        simulation = await asyncio.get_running_loop().run_in_executor(
+            None, simulate_yield, crop_key, soil_key, req.irrigation, land_acres, weather,
+            req.latitude, req.longitude, req.scenarios,
+        )
+        if simulation.lossProbability >= 0.25:
+            recommendations.insert(
+                1,
+                f"📉 {round(simulation.lossProbability * 100)}% of simulated seasons end in a loss — "
+                "consider crop insurance (PMFBY) or a lower-cost input plan.",
+            )
+
     return YieldPredictionResult(
         predictedYield=total_yield,
         yieldPerAcre=yield_per_acre,
@@ -317,4 +499,181 @@ async def predict_yield(req: YieldPredictionRequest) -> YieldPredictionResult:
         landSize=req.landSize,
         unit=req.unit,
         timestamp=datetime.utcnow(),
+        riskSimulation=simulation,
+    )
+
+
+# ── Batch Prediction ──────────────────────────────────────────────────────────
+async def _fetch_cell_weather(cells: Dict[Tuple[int, int], Tuple[float, float]], concurrency: int = 8) -> Dict[Tuple[int, int], WeatherData]:
+    """Fetch weather once per grid cell (at a farm inside it) with bounded concurrency."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(point):
+        async with sem:
+            return await _fetch_weather(*point)
+
+    results = await asyncio.gather(*(one(p) for p in cells.values()))
+    return dict(zip(cells, results))
+
+
+async def predict_yield_batch(reqs: List[YieldPredictionRequest]) -> YieldBatchResult:
+    """
+    Predict many farms at once: farms are grouped by climatology grid cell
+    (0.25°, the resolution the tiles use) and weather is fetched once per
+    cell, at the first farm in it, then every factor is computed as arrays.
+    Risk simulation is single-farm only.
+    """
+    crop_keys = [r.crop.lower().strip() for r in reqs]
+    unknown = sorted({k for k in crop_keys if k not in CROP_DB})
+    if unknown:
+        raise ValueError(f"Unsupported crop(s): {', '.join(unknown)}")
+    simulated = [i for i, r in enumerate(reqs) if r.simulate]
+    if simulated:
+        raise ValueError(
+            f"Risk simulation is not supported in batch requests (farms {', '.join(map(str, simulated[:10]))}); "
+            "use /yield/predict for simulated scenarios"
+        )
+
+    farm_cells = [cell_index(r.latitude, r.longitude) for r in reqs]
+    cells: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    for cell, r in zip(farm_cells, reqs):
+        cells.setdefault(cell, (r.latitude, r.longitude))
+    cell_weather = await _fetch_cell_weather(cells)
+
+    weathers = [cell_weather[c] for c in farm_cells]
+    out = _evaluate(
+        crop_idx=np.array([CROP_INDEX[k] for k in crop_keys]),
+        soil_idx=np.array([SOIL_INDEX[_soil_key(r.soilType)] for r in reqs]),
+        irrigation=np.array([r.irrigation for r in reqs]),
+        temperature=np.array([w.temperature for w in weathers]),
+        rainfall=np.array([w.rainfall_forecast for w in weathers]),
+        land_acres=_to_acres(np.array([r.landSize for r in reqs]), np.array([r.unit for r in reqs])),
+    )
+
+    results = [
+        YieldBatchItem(
+            index=i,
+            cropName=CROP_DB[crop_keys[i]]["display"],
+            landSize=r.landSize,
+            unit=r.unit,
+            predictedYield=float(out["total_yield"][i]),
+            yieldPerAcre=float(out["yield_per_acre"][i]),
+            expectedRevenue=float(out["revenue"][i]),
+            estimatedCost=float(out["cost"][i]),
+            expectedProfit=float(out["profit"][i]),
+            riskLevel=str(RISK_LEVELS[out["risk"][i]]),
+            weatherSummary=_weather_summary(weathers[i]),
+            weatherSource=weathers[i].source,
+        )
+        for i, r in enumerate(reqs)
+    ]
+
+    return YieldBatchResult(
+        results=results,
+        totalExpectedProfit=float(out["profit"].sum()),
+        weatherCellsFetched=len(cells),
+        timestamp=datetime.utcnow(),
+    )
+
+
+# ── All-crops Comparison ──────────────────────────────────────────────────────
+async def compare_crops(req: CropComparisonRequest) -> CropComparisonResult:
+    """
+    Evaluate every crop in CROP_DB for one farm with a single weather fetch.
+    Ranked by expected profit; lower risk breaks ties.
+    """
+    weather = await _fetch_weather(req.latitude, req.longitude)
+
+    crop_idx = np.arange(len(CROP_KEYS))
+    out = _evaluate(
+        crop_idx=crop_idx,
+        soil_idx=SOIL_INDEX[_soil_key(req.soilType)],
+        irrigation=req.irrigation,
+        temperature=weather.temperature,
+        rainfall=weather.rainfall_forecast,
+        land_acres=_to_acres(req.landSize, req.unit),
+    )
+    order = np.lexsort((out["risk"], -out["profit"]))
+
+    crops = [
+        CropComparisonItem(
+            rank=rank,
+            crop=CROP_KEYS[i],
+            cropName=CROP_DB[CROP_KEYS[i]]["display"],
+            predictedYield=float(out["total_yield"][i]),
+            yieldPerAcre=float(out["yield_per_acre"][i]),
+            expectedRevenue=float(out["revenue"][i]),
+            estimatedCost=float(out["cost"][i]),
+            expectedProfit=float(out["profit"][i]),
+            riskLevel=str(RISK_LEVELS[out["risk"][i]]),
+        )
+        for rank, i in enumerate(order, start=1)
+    ]
+
+    return CropComparisonResult(
+        crops=crops,
+        weatherSummary=_weather_summary(weather),
+        weatherData=weather,
+        landSize=req.landSize,
+        unit=req.unit,
+        timestamp=datetime.utcnow(),
+    )
+
+
+# ── What-if Sensitivity Grid ──────────────────────────────────────────────────
+MAX_SENSITIVITY_CELLS = 20000
+
+
+async def sensitivity_grid(req: SensitivityRequest) -> SensitivityResult:
+    """
+    Evaluate the Cartesian grid crop × soil × irrigation × land size × price
+    multiplier in one broadcast pass, with a single weather fetch.
+    """
+    crop_keys = [c.lower().strip() for c in (req.crops or CROP_KEYS)]
+    unknown = sorted({k for k in crop_keys if k not in CROP_DB})
+    if unknown:
+        raise ValueError(f"Unsupported crop(s): {', '.join(unknown)}")
+    soil_keys = list(dict.fromkeys(_soil_key(s) for s in req.soilTypes))
+
+    shape = (len(crop_keys), len(soil_keys), len(req.irrigation), len(req.landSizes), len(req.priceMultipliers))
+    cells = int(np.prod(shape))
+    if cells > MAX_SENSITIVITY_CELLS:
+        raise ValueError(
+            f"Grid has {cells} combinations; the limit is {MAX_SENSITIVITY_CELLS}. Narrow the parameter ranges."
+        )
+
+    weather = await _fetch_weather(req.latitude, req.longitude)
+
+    # Each parameter gets its own axis so broadcasting builds the full grid
+    crop_idx = np.array([CROP_INDEX[k] for k in crop_keys]).reshape(-1, 1, 1, 1, 1)
+    soil_idx = np.array([SOIL_INDEX[k] for k in soil_keys]).reshape(1, -1, 1, 1, 1)
+    irrigation = np.array(req.irrigation).reshape(1, 1, -1, 1, 1)
+    land_acres = _to_acres(np.array(req.landSizes, dtype=float), req.unit).reshape(1, 1, 1, -1, 1)
+    price_factor = np.array(req.priceMultipliers, dtype=float).reshape(1, 1, 1, 1, -1)
+
+    out = _evaluate(
+        crop_idx=crop_idx,
+        soil_idx=soil_idx,
+        irrigation=irrigation,
+        temperature=weather.temperature,
+        rainfall=weather.rainfall_forecast,
+        land_acres=land_acres,
+        price_factor=price_factor,
+    )
+    profit = np.broadcast_to(out["profit"], shape)
+    risk = np.broadcast_to(out["risk"], shape)[..., 0, 0]
+
+    return SensitivityResult(
+        axes={
+            "crop": crop_keys,
+            "soilType": soil_keys,
+            "irrigation": list(req.irrigation),
+            "landSize": list(req.landSizes),
+            "priceMultiplier": list(req.priceMultipliers),
+        },
+        expectedProfit=profit.astype(np.int64).tolist(),
+        riskLevel=RISK_LEVELS[risk].tolist(),
+        weatherSummary=_weather_summary(weather),
+        weatherSource=weather.source,
+        cells=cells,
     )
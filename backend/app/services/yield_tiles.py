@@ -0,0 +1,163 @@
+"""
+Precomputed Yield-Factor Tiles
+-------------------------------
+Yield per acre and risk depend only on (crop, weather cell, soil, irrigation),
+so a nightly job evaluates every combination over the climatology grid:
+
+    yield_per_acre-<build>.npy   (crops, soils, 2, N_LAT, N_LON)  float32  ≈ 4.3 MB
+    risk-<build>.npy             (crops, N_LAT, N_LON)            uint8    ≈ 0.1 MB
+    meta.json                    build time, month, axes, array file names
+
+Every build writes new, uniquely named arrays (temp file + `os.replace`) and
+then swaps meta.json to point at them, so a server still memory-mapping the
+previous build never sees its files rewritten underneath it.
+
+`predict_yield` then becomes a tile lookup plus the per-farm land-size and
+cost arithmetic.  Run nightly (e.g. cron at 01:00 IST):
+
+    python -m app.services.yield_tiles
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.climatology import climatology, cell_index, N_LAT, N_LON, TEMP, RAIN
+
+logger = logging.getLogger(__name__)
+
+TILE_MAX_AGE_SECONDS = 36 * 3600     # a missed nightly run still serves for a day
+RELOAD_CHECK_SECONDS = 60
+ARRAYS = ("yield_per_acre", "risk")
+
+
+def _atomic_write(path: Path, write):
+    tmp = path.with_name(f".tmp-{path.name}")
+    try:
+        with open(tmp, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def build_tiles(out_dir: str) -> dict:
+    """Evaluate every crop × soil × irrigation on every climatology cell and save."""
+    from app.services.yield_service import _evaluate, CROP_KEYS, SOIL_KEYS, RISK_LEVELS
+
+    if not climatology.available:
+        raise RuntimeError("Climatology store not built — run `python -m app.services.climatology` first.")
+
+    month = datetime.utcnow().month
+    grid = climatology.grid
+    temperature = np.asarray(grid[:, :, month - 1, TEMP], dtype=float)              # (N_LAT, N_LON)
+    rain_idx = (np.arange(6) + month - 1) % 12
+    rainfall = np.asarray(grid[:, :, rain_idx, RAIN], dtype=float).sum(axis=-1)     # 6-month season
+
+    out = _evaluate(
+        crop_idx=np.arange(len(CROP_KEYS)).reshape(-1, 1, 1, 1, 1),
+        soil_idx=np.arange(len(SOIL_KEYS)).reshape(1, -1, 1, 1, 1),
+        irrigation=np.array([False, True]).reshape(1, 1, -1, 1, 1),
+        temperature=temperature,
+        rainfall=rainfall,
+        land_acres=1.0,
+    )
+    yield_per_acre = out["yield_per_acre"].astype(np.float32)
+    risk = np.broadcast_to(out["risk"], yield_per_acre.shape)[:, 0, 0].astype(np.uint8)
+
+    path = Path(out_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    build = f"{int(time.time())}-{os.getpid()}"
+    files = {name: f"{name}-{build}.npy" for name in ARRAYS}
+    for name, array in (("yield_per_acre", yield_per_acre), ("risk", risk)):
+        _atomic_write(path / files[name], lambda fh, a=array: np.save(fh, a))
+    meta = {
+        "built_at": time.time(),
+        "month": month,
+        "crops": CROP_KEYS,
+        "soils": SOIL_KEYS,
+        "risk_levels": RISK_LEVELS.tolist(),
+        "shape": list(yield_per_acre.shape),
+        "files": files,
+    }
+    # meta.json is swapped last so readers never see it ahead of the arrays
+    _atomic_write(path / "meta.json", lambda fh: fh.write(json.dumps(meta).encode()))
+    # Older builds can go: a process still mapping one keeps the inode alive
+    for stale in path.glob("*.npy"):
+        if stale.name not in files.values():
+            stale.unlink(missing_ok=True)
+    return meta
+
+
+class YieldTileStore:
+    def __init__(self, tile_dir: str):
+        self.dir = Path(tile_dir)
+        self.meta: Optional[dict] = None
+        self.yield_per_acre: Optional[np.ndarray] = None
+        self.risk: Optional[np.ndarray] = None
+        self._meta_mtime = 0.0
+        self._last_check = 0.0
+
+    def _maybe_reload(self):
+        now = time.time()
+        if now - self._last_check < RELOAD_CHECK_SECONDS:
+            return
+        self._last_check = now
+        meta_path = self.dir / "meta.json"
+        try:
+            mtime = meta_path.stat().st_mtime
+        except OSError:
+            self.meta = None
+            return
+        if mtime == self._meta_mtime:
+            return
+        try:
+            meta = json.loads(meta_path.read_text())
+            files = meta.get("files") or {name: f"{name}.npy" for name in ARRAYS}
+            yield_per_acre = np.load(self.dir / files["yield_per_acre"], mmap_mode="r")
+            risk = np.load(self.dir / files["risk"], mmap_mode="r")
+            if list(yield_per_acre.shape) != meta["shape"] or yield_per_acre.shape[-2:] != (N_LAT, N_LON):
+                raise ValueError(f"tile shape {yield_per_acre.shape} does not match meta {meta['shape']}")
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            # Keep serving the previously loaded tiles (if any); retried next check
+            logger.warning("Could not load yield tiles from %s: %s", self.dir, exc)
+            return
+        self.meta, self.yield_per_acre, self.risk = meta, yield_per_acre, risk
+        self._meta_mtime = mtime
+
+    def is_fresh(self) -> bool:
+        self._maybe_reload()
+        return (
+            self.meta is not None
+            and time.time() - self.meta["built_at"] < TILE_MAX_AGE_SECONDS
+            and self.meta["month"] == datetime.utcnow().month
+        )
+
+    def lookup(self, crop_key: str, soil_key: str, irrigation: bool, lat: float, lon: float) -> Optional[Tuple[float, str]]:
+        """(yield per acre, risk level) for this farm's tile, or None to use the live path."""
+        if not self.is_fresh():
+            return None
+        meta = self.meta
+        if crop_key not in meta["crops"] or soil_key not in meta["soils"]:
+            return None
+        c, s = meta["crops"].index(crop_key), meta["soils"].index(soil_key)
+        i, j = cell_index(lat, lon)
+        yield_per_acre = round(float(self.yield_per_acre[c, s, int(irrigation), i, j]), 3)
+        return yield_per_acre, meta["risk_levels"][int(self.risk[c, i, j])]
+
+
+yield_tiles = YieldTileStore(settings.YIELD_TILES_DIR)
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    meta = build_tiles(settings.YIELD_TILES_DIR)
+    print(f"Built yield tiles {meta['shape']} for month {meta['month']} "
+          f"in {time.perf_counter() - started:.2f}s → {settings.YIELD_TILES_DIR}")
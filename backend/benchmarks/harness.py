@@ -0,0 +1,86 @@
+"""
+Shared setup for the HTTP benchmarks: the real FastAPI app with auth and
+MongoDB replaced by in-memory stand-ins, blobs in a temp directory and
+rate limiting off, driven in-process through httpx's ASGI transport.
+"""
+import copy
+import os
+import tempfile
+from types import SimpleNamespace
+
+os.environ.setdefault("BLOB_STORE_DIR", tempfile.mkdtemp(prefix="cropsense-bench-"))
+
+import httpx                                   # noqa: E402
+from bson import ObjectId                      # noqa: E402
+
+from app.config import settings                # noqa: E402
+from app.database import get_db                # noqa: E402
+from app.main import app                       # noqa: E402
+from app.repositories.user_repository import UserRepository  # noqa: E402
+from app.routes.auth import get_current_user, get_user_repository  # noqa: E402
+
+settings.RATE_LIMIT_ENABLED = False
+
+
+class _Inserted:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class MemoryCollection:
+    """The handful of motor collection calls the benchmarked routes make."""
+
+    def __init__(self):
+        self.docs = []
+
+    @staticmethod
+    def _match(doc, query):
+        return all(doc.get(k) == v for k, v in (query or {}).items())
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(copy.deepcopy(doc))
+        return _Inserted(doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            await self.insert_one(doc)
+
+    async def find_one(self, query, *args, **kwargs):
+        return next((copy.deepcopy(d) for d in self.docs if self._match(d, query)), None)
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(copy.deepcopy(update.get("$set", {})))
+                return
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs = [d for d in self.docs if not self._match(d, query)]
+        self.docs.append(copy.deepcopy(doc))
+
+
+class MemoryDB(dict):
+    def __missing__(self, name):
+        self[name] = MemoryCollection()
+        return self[name]
+
+
+def client(db: MemoryDB = None, user_email: str = "bench@example.com", timeout: float = 120) -> httpx.AsyncClient:
+    """AsyncClient bound to the app with the overrides installed."""
+    db = db if db is not None else MemoryDB()
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_user_repository] = lambda: UserRepository(db)
+    if user_email:
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(email=user_email)
+    else:
+        app.dependency_overrides.pop(get_current_user, None)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
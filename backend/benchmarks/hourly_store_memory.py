@@ -0,0 +1,70 @@
+"""
+Hourly forecast memory benchmark
+---------------------------------
+Fills the per-cell float32 store with 16-day hourly series and compares its
+footprint with the equivalent list of per-hour dicts:
+
+    cd backend && PYTHONPATH=. python benchmarks/hourly_store_memory.py --cells 1000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services.forecast_store import HourlyForecastStore, HOUR
+
+HOURS = 16 * 24
+
+
+def synthetic_series(rng: np.random.Generator):
+    temps = 28 + 6 * rng.standard_normal(HOURS)
+    hums = np.clip(65 + 15 * rng.standard_normal(HOURS), 5, 100)
+    return temps, hums
+
+
+def measure(fn) -> int:
+    tracemalloc.start()
+    held = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cells", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    series = [synthetic_series(rng) for _ in range(args.cells)]
+    start = int(time.time()) // HOUR * HOUR
+
+    def fill_store():
+        store = HourlyForecastStore(max_cells=args.cells)
+        for k, (temps, hums) in enumerate(series):
+            store.put((k, 0), start, temps, hums, source="benchmark")
+        return store
+
+    def fill_dicts():
+        return {
+            (k, 0): [
+                {"time": start + h * HOUR, "temperature": float(temps[h]), "humidity": float(hums[h])}
+                for h in range(HOURS)
+            ]
+            for k, (temps, hums) in enumerate(series)
+        }
+
+    store = fill_store()
+    store_bytes = measure(fill_store)
+    dict_bytes = measure(fill_dicts)
+    print(f"cells={args.cells} hours/cell={HOURS}")
+    print(f"store footprint()   {store.footprint()}")
+    print(f"float32 store       {store_bytes / 1e6:8.2f} MB ({store_bytes / args.cells / 1e3:.1f} KB/cell)")
+    print(f"list of dicts       {dict_bytes / 1e6:8.2f} MB ({dict_bytes / args.cells / 1e3:.1f} KB/cell)")
+    print(f"reduction           {dict_bytes / max(store_bytes, 1):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
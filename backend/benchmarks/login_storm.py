@@ -0,0 +1,57 @@
+"""
+Login storm benchmark
+---------------------
+Registers one user, fires a burst of concurrent /auth/login requests (each a
+bcrypt verify on the bounded hash pool) and samples /health latency while
+they are in flight.  Logins beyond AUTH_HASH_WORKERS + AUTH_HASH_MAX_QUEUE
+are shed with 503 rather than stalling the event loop:
+
+    cd backend && PYTHONPATH=. python benchmarks/login_storm.py --logins 60
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import harness
+
+EMAIL = "storm@example.com"
+PASSWORD = "pw123456"
+
+
+async def run(logins: int, probes: int) -> None:
+    async with harness.client(harness.MemoryDB(), user_email=None) as c:
+        r = await c.post("/auth/register", json={"email": EMAIL, "name": "Storm", "password": PASSWORD})
+        r.raise_for_status()
+
+        started = time.perf_counter()
+        burst = [
+            asyncio.create_task(c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD}))
+            for _ in range(logins)
+        ]
+        latency = []
+        for k in range(probes):
+            target = started + k * 0.05
+            await asyncio.sleep(max(0.0, target - time.perf_counter()))
+            await c.get("/health")
+            latency.append((time.perf_counter() - target) * 1000)
+        responses = await asyncio.gather(*burst)
+        elapsed = time.perf_counter() - started
+
+    codes = Counter(r.status_code for r in responses)
+    print(f"logins={logins} statuses={dict(sorted(codes.items()))} burst {elapsed:.2f}s")
+    print(f"/health during burst  p50 {statistics.median(latency):.1f} ms  "
+          f"p95 {harness.percentile(latency, 0.95):.1f} ms  max {max(latency):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="login burst vs event-loop latency")
+    parser.add_argument("--logins", type=int, default=60)
+    parser.add_argument("--probes", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.probes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Spoilage lookup-table benchmark
+--------------------------------
+Times the path /spoilage-risk/batch actually runs — `calculate_risk_batch`
+with and without `use_tables`, then the endpoint itself on a CSV body with
+`?interpolate=false|true` — and reports the tables' error on random shipments:
+
+    cd backend && PYTHONPATH=. python benchmarks/spoilage_tables.py --rows 100000
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+import harness
+from app.services.india_mandi_data import CROP_SPOILAGE_PROFILE
+from app.services.spoilage_model import STORAGE_MULTIPLIERS, SpoilageModel, SpoilageTables, spoilage_tables
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def endpoint_ms(body: bytes, interpolate: bool, repeat: int) -> float:
+    samples = []
+    async with harness.client() as c:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            r = await c.post(f"/spoilage-risk/batch?interpolate={str(interpolate).lower()}",
+                             content=body, headers={"content-type": "text/csv"})
+            r.raise_for_status()
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="spoilage tables vs exact formula")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--endpoint-repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.rows
+    crops = rng.choice(list(CROP_SPOILAGE_PROFILE), n).astype(object)
+    storages = rng.choice(list(STORAGE_MULTIPLIERS), n).astype(object)
+    temperature = rng.uniform(-5, 50, n)
+    humidity = rng.uniform(0, 100, n)
+    days = rng.uniform(0, 45, n)
+
+    started = time.perf_counter()
+    tables = SpoilageTables().build()
+    build_ms = (time.perf_counter() - started) * 1000
+    spoilage_tables.build()
+    model = SpoilageModel()
+
+    def batch(use_tables):
+        return model.calculate_risk_batch(temperature, humidity, storages, days, crops, use_tables=use_tables)
+
+    exact_ms = timed(lambda: batch(False), args.repeat)
+    table_ms = timed(lambda: batch(True), args.repeat)
+    error = np.abs(batch(True)["spoilage_probability"] - batch(False)["spoilage_probability"])
+
+    body = pd.DataFrame({
+        "temperature": temperature.round(1), "humidity": humidity.round(1),
+        "storage_type": storages, "transit_days": days.round(1), "crop": crops,
+    }).to_csv(index=False).encode()
+    http_exact = asyncio.run(endpoint_ms(body, False, args.endpoint_repeat))
+    http_table = asyncio.run(endpoint_ms(body, True, args.endpoint_repeat))
+
+    print(f"table {tables.table.shape} {tables.table.nbytes / 1e6:.2f} MB, built in {build_ms:.1f} ms")
+    print(f"rows={n}  calculate_risk_batch  exact {exact_ms:7.1f} ms   tables {table_ms:7.1f} ms")
+    print(f"rows={n}  POST /batch (csv)     exact {http_exact:7.1f} ms   tables {http_table:7.1f} ms"
+          f"   ({len(body) / 1e6:.1f} MB body)")
+    print(f"abs error  mean {error.mean():.4f}  p99 {np.percentile(error, 99):.4f}  max {error.max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
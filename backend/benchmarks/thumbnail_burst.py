@@ -0,0 +1,62 @@
+"""
+Thumbnail burst benchmark
+--------------------------
+Uploads a burst of full-resolution camera JPEGs to /disease/detect with local
+blob storage, so every scan renders a WebP thumbnail in the process pool,
+and reports throughput plus the peak RSS of the API process and of the
+thumbnail workers:
+
+    cd backend && PYTHONPATH=. python benchmarks/thumbnail_burst.py --images 12
+"""
+import argparse
+import asyncio
+import io
+import resource
+import time
+
+import numpy as np
+from PIL import Image
+
+import harness
+from app.services.thumbnails import shutdown_pool
+
+
+def camera_jpeg(seed: int, size=(4000, 3000)) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+async def run(images: list) -> None:
+    async with harness.client() as c:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            c.post("/disease/detect", files={"file": (f"leaf{i}.jpg", data, "image/jpeg")})
+            for i, data in enumerate(images)
+        ))
+        elapsed = time.perf_counter() - started
+        thumb = await c.get(responses[0].json()["thumbnailUrl"])
+
+    print(f"images={len(images)} statuses={sorted({r.status_code for r in responses})}")
+    print(f"burst {elapsed:.2f}s  {len(images) / elapsed:.1f} images/s")
+    print(f"thumbnail {thumb.headers['content-type']} {Image.open(io.BytesIO(thumb.content)).size} "
+          f"{len(thumb.content) / 1024:.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="thumbnail rendering under a burst of uploads")
+    parser.add_argument("--images", type=int, default=12)
+    args = parser.parse_args()
+
+    images = [camera_jpeg(i) for i in range(args.images)]
+    print(f"input JPEG {len(images[0]) / 1e6:.1f} MB each")
+    asyncio.run(run(images))
+    shutdown_pool(wait=True)          # reap the workers so RUSAGE_CHILDREN covers them
+    to_mb = 1 / 1024          # ru_maxrss is KiB on Linux
+    print(f"peak RSS  api {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * to_mb:.0f} MB  "
+          f"thumbnail workers {resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * to_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
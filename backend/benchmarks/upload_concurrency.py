@@ -0,0 +1,63 @@
+"""
+Cloudinary upload concurrency benchmark
+----------------------------------------
+Fires a burst of /disease/detect uploads against a stand-in Cloudinary SDK
+that blocks for --upload-ms (as the real synchronous uploader does), and
+samples /health latency while they are in flight.  With uploads on the
+bounded thread pool the event loop stays responsive:
+
+    cd backend && PYTHONPATH=. python benchmarks/upload_concurrency.py --uploads 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+import harness
+from app.services import disease_service
+
+
+def install_slow_cloudinary(upload_ms: float):
+    def upload(*args, **kwargs):
+        time.sleep(upload_ms / 1000)
+        return {"secure_url": "https://res.cloudinary.com/bench/image/upload/leaf.png"}
+
+    disease_service._configure_cloudinary = lambda: True
+    disease_service.cloudinary = SimpleNamespace(uploader=SimpleNamespace(upload=upload))
+
+
+async def run(uploads: int, probes: int) -> None:
+    async with harness.client() as c:
+        started = time.perf_counter()
+        burst = [
+            asyncio.create_task(c.post("/disease/detect", files={"file": ("leaf.png", bytes([i % 256]) * 4000, "image/png")}))
+            for i in range(uploads)
+        ]
+        latency = []
+        for k in range(probes):
+            target = started + k * 0.05
+            await asyncio.sleep(max(0.0, target - time.perf_counter()))
+            await c.get("/health")
+            latency.append((time.perf_counter() - target) * 1000)
+        responses = await asyncio.gather(*burst)
+        elapsed = time.perf_counter() - started
+
+    codes = sorted({r.status_code for r in responses})
+    print(f"uploads={uploads} statuses={codes} burst {elapsed:.2f}s")
+    print(f"/health during burst  p50 {statistics.median(latency):.1f} ms  "
+          f"p95 {harness.percentile(latency, 0.95):.1f} ms  max {max(latency):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="upload burst vs event-loop latency")
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--upload-ms", type=float, default=300)
+    parser.add_argument("--probes", type=int, default=20)
+    args = parser.parse_args()
+    install_slow_cloudinary(args.upload_ms)
+    asyncio.run(run(args.uploads, args.probes))
+
+
+if __name__ == "__main__":
+    main()
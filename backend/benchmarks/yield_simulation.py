@@ -0,0 +1,72 @@
+"""
+Monte Carlo yield simulation benchmark
+---------------------------------------
+Times `simulate_yield` at several scenario counts, and measures how much an
+in-flight simulation delays other requests on the event loop (it runs in the
+default executor, as /yield/predict does):
+
+    cd backend && PYTHONPATH=. python benchmarks/yield_simulation.py --repeat 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+
+from app.models.yield_model import WeatherData
+from app.services.yield_service import simulate_yield
+
+WEATHER = WeatherData(temperature=27.5, humidity=62, rainfall_forecast=640.0, wind_speed=3.1, description="Clear")
+FARM = dict(crop_key="wheat", soil_key="alluvial", irrigation=True, land_acres=4.0,
+            weather=WEATHER, lat=28.61, lon=77.21)
+
+
+def time_scenarios(n: int, repeat: int) -> list:
+    rng = np.random.default_rng(0)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        simulate_yield(**FARM, n=n, rng=rng)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def loop_lag(n: int, concurrent: int) -> float:
+    """Worst delay (ms) of a 1 ms ticker while `concurrent` simulations run in the executor."""
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst = max(worst, (time.perf_counter() - started) * 1000 - 1)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*(
+        loop.run_in_executor(None, lambda: simulate_yield(**FARM, n=n)) for _ in range(concurrent)
+    ))
+    done.set()
+    await task
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="simulate_yield latency")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrent", type=int, default=8)
+    args = parser.parse_args()
+
+    for n in (1_000, 10_000, 20_000):
+        samples = sorted(time_scenarios(n, args.repeat))
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"n={n:>6}  p50 {statistics.median(samples):7.2f} ms   p95 {p95:7.2f} ms")
+    lag = asyncio.run(loop_lag(20_000, args.concurrent))
+    print(f"event-loop lag with {args.concurrent} concurrent n=20000 simulations: {lag:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
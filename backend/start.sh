@@ -2,4 +2,7 @@
 # Start script for Railway or manual server runs
 export PORT="${PORT:-5000}"
 echo "Starting CropSense AI Backend on 0.0.0.0:$PORT"
-uvicorn app.main:app --host 0.0.0.0 --port $PORT
+# Behind the platform proxy: take the scheme from X-Forwarded-Proto; the rate
+# limiter reads the client from the proxy-appended X-Forwarded-For hop
+export TRUSTED_PROXY_HOPS="${TRUSTED_PROXY_HOPS:-1}"
+uvicorn app.main:app --host 0.0.0.0 --port $PORT --proxy-headers --forwarded-allow-ips '*'
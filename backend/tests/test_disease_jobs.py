@@ -0,0 +1,295 @@
+"""
+Async disease jobs driven end to end against the local Plant.id stub
+(app.services.plant_id_stub) over an in-process transport, with an in-memory
+stand-in for the MongoDB collections the queue touches.
+"""
+import asyncio
+import copy
+import os
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from bson import ObjectId
+
+from app.config import settings
+from app.repositories.disease_job_repository import DiseaseJobRepository
+from app.services import blob_store, disease_jobs, disease_service, plant_id_stub, thumbnails
+from app.services.disease_service import DISEASE_LIBRARY, LeafImage
+
+LIBRARY_NAMES = {entry["diseaseName"] for entry in DISEASE_LIBRARY}
+
+
+# ── In-memory MongoDB stand-in ────────────────────────────────────────────────
+class _Inserted:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction=1):
+        self.docs.sort(key=lambda d: d.get(field), reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        async def iterate():
+            for doc in self.docs:
+                yield copy.deepcopy(doc)
+        return iterate()
+
+
+class MemoryCollection:
+    def __init__(self, name, database):
+        self.name = name
+        self.database = database
+        self.docs = []
+        self.indexes = {"_id_": {"key": [("_id", 1)]}}
+
+    @staticmethod
+    def _match(doc, query):
+        for field, value in (query or {}).items():
+            if isinstance(value, dict) and "$in" in value:
+                if doc.get(field) not in value["$in"]:
+                    return False
+            elif doc.get(field) != value:
+                return False
+        return True
+
+    async def index_information(self):
+        return copy.deepcopy(self.indexes)
+
+    async def create_index(self, keys, expireAfterSeconds=None, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = "_".join(f"{field}_{direction}" for field, direction in keys)
+        spec = {"key": keys}
+        if expireAfterSeconds is not None:
+            spec["expireAfterSeconds"] = expireAfterSeconds
+        self.indexes[name] = spec
+        return name
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(copy.deepcopy(doc))
+        return _Inserted(doc["_id"])
+
+    async def find_one(self, query, *args, **kwargs):
+        return next((copy.deepcopy(d) for d in self.docs if self._match(d, query)), None)
+
+    def find(self, query=None, projection=None, **kwargs):
+        return _Cursor([d for d in self.docs if self._match(d, query)])
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(copy.deepcopy(update["$set"]))
+                return
+
+    async def update_many(self, query, update):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(copy.deepcopy(update["$set"]))
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs = [d for d in self.docs if not self._match(d, query)]
+        self.docs.append(copy.deepcopy(doc))
+
+
+class MemoryDB(dict):
+    def __init__(self):
+        super().__init__()
+        self.commands = []
+
+    def __missing__(self, name):
+        self[name] = MemoryCollection(name, self)
+        return self[name]
+
+    async def command(self, name, collection, **kwargs):
+        self.commands.append((name, collection, kwargs))
+        index = kwargs["index"]
+        self[collection].indexes[index["name"]]["expireAfterSeconds"] = index["expireAfterSeconds"]
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+@pytest.fixture
+def plant_id(monkeypatch, tmp_path):
+    """Route Plant.id calls to the stub; `outcomes` scripts which calls fail (True = 503)."""
+    outcomes = []
+    calls = []
+    stub_transport = httpx.ASGITransport(app=plant_id_stub.create_app(fail_rate=0.5))
+    real_client = httpx.AsyncClient
+
+    def stub_client(**kwargs):
+        calls.append(1)
+        return real_client(transport=stub_transport, **kwargs)
+
+    monkeypatch.setattr(disease_service, "httpx", SimpleNamespace(AsyncClient=stub_client))
+    # fail_rate=0.5: random() < 0.5 fails, so 0.0 → 503 and 1.0 → success
+    monkeypatch.setattr(plant_id_stub.random, "random", lambda: 0.0 if outcomes and outcomes.pop(0) else 1.0)
+    monkeypatch.setattr(settings, "PLANT_ID_API_KEY", "stub")
+    monkeypatch.setattr(settings, "PLANT_ID_API_URL", "http://plant-id.stub/v3/health_assessment")
+    monkeypatch.setattr(settings, "PUBLIC_BASE_URL", "http://testserver")
+    monkeypatch.setattr(settings, "DISEASE_BACKEND", "auto")
+    monkeypatch.setattr(blob_store.blob_store, "root", tmp_path)
+    monkeypatch.setattr(disease_jobs, "RETRY_BASE_SECONDS", 0.01)
+
+    async def no_thumbnail(data, sha256_hex):
+        return None
+
+    monkeypatch.setattr(thumbnails, "create_local_thumbnail", no_thumbnail)
+    return SimpleNamespace(outcomes=outcomes, calls=calls)
+
+
+def leaf() -> LeafImage:
+    # Fresh bytes per image so the shared analysis cache never answers for the stub
+    return LeafImage.from_bytes(b"\x89PNG" + os.urandom(256), "leaf.png", "image/png")
+
+
+async def wait_for_status(db, job_id, statuses, timeout=5.0):
+    repo = DiseaseJobRepository(db)
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = await repo.get_job(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+# ── Tests ─────────────────────────────────────────────────────────────────────
+def test_job_runs_against_stub_and_notifies_subscribers(plant_id):
+    db = MemoryDB()
+    queue = disease_jobs.DiseaseJobQueue(workers=1, max_queued=4)
+
+    async def scenario():
+        await queue.start(db)
+        try:
+            job_id = await queue.submit(leaf(), None, "farmer@example.com")
+            events = queue.subscribe(job_id)
+            seen = []
+            while not seen or seen[-1]["status"] not in disease_jobs.TERMINAL:
+                seen.append(disease_jobs.public_job(await asyncio.wait_for(events.get(), 5), "http://client"))
+            return seen
+        finally:
+            await queue.stop()
+
+    seen = asyncio.run(scenario())
+    assert [event["status"] for event in seen] == ["running", "done"]
+    result = seen[-1]["result"]
+    assert result["diseaseName"] in LIBRARY_NAMES
+    assert result["imageUrl"].startswith("http://testserver/disease/images/")
+    assert len(db["disease_detections"].docs) == 1
+    assert len(plant_id.calls) == 1
+
+
+def test_failed_calls_are_retried_with_backoff(plant_id):
+    db = MemoryDB()
+    queue = disease_jobs.DiseaseJobQueue(workers=1, max_queued=4)
+    plant_id.outcomes.extend([True, False])          # 503, then success
+
+    async def scenario():
+        await queue.start(db)
+        try:
+            job_id = await queue.submit(leaf(), None, "farmer@example.com")
+            return await wait_for_status(db, job_id, disease_jobs.TERMINAL)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "done"
+    assert job["attempts"] == 2
+    assert queue.stats["retries"] == 1
+    assert len(plant_id.calls) == 2
+
+
+def test_job_fails_after_max_attempts(plant_id):
+    db = MemoryDB()
+    queue = disease_jobs.DiseaseJobQueue(workers=1, max_queued=4)
+    plant_id.outcomes.extend([True] * disease_jobs.MAX_ATTEMPTS)
+
+    async def scenario():
+        await queue.start(db)
+        try:
+            job_id = await queue.submit(leaf(), None, "farmer@example.com")
+            return await wait_for_status(db, job_id, disease_jobs.TERMINAL)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "failed"
+    assert job["attempts"] == disease_jobs.MAX_ATTEMPTS
+    assert "503" in job["error"]
+    assert db["disease_detections"].docs == []
+
+
+def test_unfinished_jobs_are_requeued_on_restart(plant_id):
+    db = MemoryDB()
+
+    async def scenario():
+        repo = DiseaseJobRepository(db)
+        job_ids = []
+        for status in ("running", "queued"):
+            image = leaf()
+            key = blob_store.blob_store.put(image.data, image.sha256, "png")
+            job_ids.append(await repo.create_job({
+                "user_email": "farmer@example.com", "status": status, "attempts": 0,
+                "blob_key": key, "filename": "leaf.png", "content_type": "image/png", "crop_hint": None,
+            }))
+        queue = disease_jobs.DiseaseJobQueue(workers=2, max_queued=4)
+        await queue.start(db)
+        try:
+            return [await wait_for_status(db, job_id, disease_jobs.TERMINAL) for job_id in job_ids]
+        finally:
+            await queue.stop()
+
+    jobs = asyncio.run(scenario())
+    assert [job["status"] for job in jobs] == ["done", "done"]
+
+
+def test_full_queue_answers_503_with_retry_after(plant_id, monkeypatch):
+    from app.database import get_db
+    from app.main import app
+    from app.routes import disease as disease_routes
+    from app.routes.auth import get_current_user
+
+    db = MemoryDB()
+    queue = disease_jobs.DiseaseJobQueue(workers=0, max_queued=1)
+    monkeypatch.setattr(disease_routes, "disease_jobs", queue)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    monkeypatch.setitem(app.dependency_overrides, get_current_user,
+                        lambda: SimpleNamespace(email="farmer@example.com"))
+
+    async def scenario():
+        await queue.start(db)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as c:
+                return [
+                    await c.post("/disease/detect?async=true", files={"file": ("leaf.png", leaf().data, "image/png")})
+                    for _ in range(2)
+                ]
+        finally:
+            await queue.stop()
+
+    accepted, rejected = asyncio.run(scenario())
+    assert accepted.status_code == 202
+    assert rejected.status_code == 503
+    assert int(rejected.headers["retry-after"]) >= 1
+    # The rejected submit left no orphan "queued" job behind
+    assert [job["status"] for job in db["disease_jobs"].docs] == ["queued"]
+
+
+def test_jobs_expire_through_a_ttl_index():
+    db = MemoryDB()
+    repo = DiseaseJobRepository(db)
+
+    async def scenario():
+        await repo.ensure_indexes(7 * 24 * 3600)
+        await repo.ensure_indexes(24 * 3600)            # retuned in place, not recreated
+
+    asyncio.run(scenario())
+    ttl = [spec for spec in db["disease_jobs"].indexes.values() if "expireAfterSeconds" in spec]
+    assert ttl == [{"key": [("created_at", 1)], "expireAfterSeconds": 24 * 3600}]
+    assert [name for name, *_ in db.commands] == ["collMod"]
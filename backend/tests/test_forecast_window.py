@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+import numpy as np
+
+from app.services.climatology import cell_index
+from app.services.forecast_store import HOUR, hourly_store
+from app.services.weather_service import WeatherService
+
+LAT, LON = 28.61, 77.21
+
+
+def test_entry_from_previous_utc_day_is_refetched(monkeypatch):
+    today = int(time.time()) // 86400 * 86400
+    # 02:00 UTC (07:30 IST): the next 12 hours fit in today, so one day is requested
+    monkeypatch.setattr(time, "time", lambda: today + 2 * HOUR)
+    # Fetched just before midnight UTC: 24 hours that end where today begins
+    hourly_store.put(cell_index(LAT, LON), today - 86400, np.full(24, 20.0), np.full(24, 50.0), source="open-meteo")
+
+    service = WeatherService()
+    requested = []
+
+    async def request(lat, lon, timeout=None, **params):
+        requested.append(params["forecast_days"])
+        hours = params["forecast_days"] * 24
+        return {"hourly": {
+            "time": [today + h * HOUR for h in range(hours)],
+            "temperature_2m": [30.0] * hours,
+            "relative_humidity_2m": [70.0] * hours,
+        }}
+
+    monkeypatch.setattr(service.open_meteo, "request", request)
+    window, source = asyncio.run(service.get_forecast_window(LAT, LON, 12))
+
+    assert requested, "stale entry was served from the cache"
+    assert source == "open-meteo"
+    assert window.shape == (2, 12)
+    np.testing.assert_array_equal(window[0], 30.0)
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.services import google_certs_stub as stub
+from app.services.google_certs import GoogleCertCache
+
+AUDIENCE = "cropsense-test.apps.googleusercontent.com"
+
+
+@pytest.fixture(scope="module")
+def keys(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("google-stub")
+    return stub.load_or_create_key(str(directory / "old.pem")), stub.load_or_create_key(str(directory / "new.pem"))
+
+
+def make_cache(monkeypatch, published: dict) -> GoogleCertCache:
+    """Cache whose refresh serves a copy of `published` instead of calling Google."""
+    cache = GoogleCertCache("http://google.invalid/oauth2/v1/certs")
+
+    async def refresh():
+        cache._certs = dict(published)
+        cache._expires_at = float("inf")
+        cache.stats["refreshes"] += 1
+
+    monkeypatch.setattr(cache, "refresh", refresh)
+    return cache
+
+
+def test_verify_valid_token(monkeypatch, keys):
+    old, _ = keys
+    cache = make_cache(monkeypatch, {stub.KEY_ID: stub.certificate_pem(old)})
+
+    claims = asyncio.run(cache.verify(stub.issue_token(old, "farmer@example.com", AUDIENCE), AUDIENCE))
+
+    assert claims["email"] == "farmer@example.com"
+    assert cache.stats == {"refreshes": 1, "refresh_errors": 0, "forced_refreshes": 0}
+
+
+def test_rotation_forces_one_refresh_then_cooldown_rejects(monkeypatch, keys):
+    old, new = keys
+    published = {stub.KEY_ID: stub.certificate_pem(old)}
+    cache = make_cache(monkeypatch, published)
+
+    async def scenario():
+        await cache.get_certs()
+        published["rotated"] = stub.certificate_pem(new)
+        claims = await cache.verify(stub.issue_token(new, "farmer@example.com", AUDIENCE, key_id="rotated"), AUDIENCE)
+        assert claims["email"] == "farmer@example.com"
+        with pytest.raises(ValueError, match="Unknown key id"):
+            await cache.verify(stub.issue_token(new, "farmer@example.com", AUDIENCE, key_id="forged"), AUDIENCE)
+
+    asyncio.run(scenario())
+    assert cache.stats["refreshes"] == 2
+    assert cache.stats["forced_refreshes"] == 1
+
+
+def test_wrong_audience_is_rejected(monkeypatch, keys):
+    old, _ = keys
+    cache = make_cache(monkeypatch, {stub.KEY_ID: stub.certificate_pem(old)})
+
+    with pytest.raises(ValueError):
+        asyncio.run(cache.verify(stub.issue_token(old, "farmer@example.com", "someone-else"), AUDIENCE))
@@ -0,0 +1,64 @@
+import asyncio
+
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.config import settings
+from app.rate_limit import RateLimitMiddleware
+
+PROXY = ("10.0.0.2", 443)
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def deployed_app():
+    # As started by render.yaml: uvicorn trusts every hop for the scheme
+    return ProxyHeadersMiddleware(RateLimitMiddleware(ok), trusted_hosts="*")
+
+
+async def login(app, forwarded_for: str) -> int:
+    scope = {
+        "type": "http", "method": "POST", "path": "/auth/login", "scheme": "http",
+        "client": PROXY, "headers": [(b"x-forwarded-for", forwarded_for.encode())],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_bucket(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    app = deployed_app()
+
+    async def scenario():
+        # The client rotates the leftmost entry; Render appends the real peer
+        return [await login(app, f"1.2.3.{i}, 203.0.113.7") for i in range(8)]
+
+    statuses = asyncio.run(scenario())
+    assert statuses[:5] == [200] * 5
+    assert statuses[5:] == [429] * 3
+
+
+def test_distinct_clients_get_their_own_buckets(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    app = deployed_app()
+
+    async def scenario():
+        first = [await login(app, "203.0.113.7") for _ in range(6)]
+        second = [await login(app, "203.0.113.8") for _ in range(5)]
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first[-1] == 429
+    assert second == [200] * 5
@@ -0,0 +1,32 @@
+import numpy as np
+
+from app.services.spoilage_model import SpoilageModel, SpoilageTables
+
+# Worst case measured at ~0.015, at humidity nodes just past a crop threshold
+MAX_TABLE_ERROR = 0.02
+
+
+def test_table_error_is_bounded():
+    tables = SpoilageTables().build()
+    assert tables.max_abs_error(samples=50_000, seed=1) <= MAX_TABLE_ERROR
+
+
+def test_lookup_matches_exact_on_grid_nodes():
+    tables = SpoilageTables().build()
+    temperature = np.repeat(tables.TEMPS, len(tables.HUMS))
+    humidity = np.tile(tables.HUMS, len(tables.TEMPS))
+    days = np.full(temperature.shape, 7.0)
+    crops = np.full(temperature.shape, "tomato")
+    storages = np.full(temperature.shape, "open")
+
+    exact = SpoilageModel().calculate_risk_batch(temperature, humidity, storages, days, crops)
+    approx = tables.lookup(crops, storages, temperature, humidity, days)
+    np.testing.assert_allclose(approx, exact["spoilage_probability"], atol=1e-3)
+
+
+def test_transits_beyond_a_month_match_exact():
+    tables = SpoilageTables().build()
+    days = np.array([31.0, 45.0, 60.0])
+    args = (np.full(3, "wheat"), np.full(3, "warehouse"), np.full(3, 30.0), np.full(3, 60.0), days)
+    exact = SpoilageModel().calculate_risk_batch(args[2], args[3], args[1], days, args[0])
+    np.testing.assert_allclose(tables.lookup(*args), exact["spoilage_probability"], atol=1e-3)